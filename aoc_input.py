@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# aoc_input.py
+# By Sebastian Raaphorst, 2018.
+
+
+import aocd
+import os
+
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'aoc')
+
+
+def get_input(day, session, year=2018):
+    """
+    Get the puzzle input for a given day, caching it on disk so that only the first run needs to go to the network.
+    :param day: the day of the puzzle
+    :param session: the aocd session, used to fetch the input if it has not been cached yet
+    :param year: the year of the puzzle
+    :return: the puzzle input
+    """
+    path = os.path.join(CACHE_DIR, '{}_{}.txt'.format(year, day))
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read()
+
+    data = aocd.get_data(session=session, year=year, day=day)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(data)
+    return data
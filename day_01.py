@@ -3,13 +3,16 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import io
+import numpy as np
 
 
 def frequency(freqs):
     """
     Given a list of frequencies of the form [+-]\d+, with one per line, find their sum.
-    :param freqs: the list of frequencies
+    :param freqs: the list or array of frequencies
     :return: the sum of the frequencies
 
     >>> frequency([+1, -2, +3, +1])
@@ -21,29 +24,14 @@ def frequency(freqs):
     >>> frequency([-1, -2, -3])
     -6
     """
-    return sum(freqs)
-
-
-def frequency_generator(freqs):
-    """
-    Given a file of frequencies, i.e. a line-separated list of numbers of the form [+-]\d+, stream
-    them infinitely.
-    :param freqs: the list of frequencies
-    :return: the next frequency
-    """
-    n = 0
-    while True:
-        if n == len(freqs):
-            n = 0
-        yield freqs[n]
-        n += 1
+    return int(np.sum(freqs, dtype=np.int64))
 
 
 def find_repeated_frequency(freqs):
     """
     For a list of frequencies that affect the current state, find the first repeating frequency.
     :param freqs: the list of frequencies
-    :return: the first repeated frequency
+    :return: the first repeated frequency, or None if no frequency ever repeats
 
     >>> find_repeated_frequency([+1, -2, +3, +1])
     2
@@ -55,22 +43,48 @@ def find_repeated_frequency(freqs):
     5
     >>> find_repeated_frequency([+7, +7, -2, -7, -4])
     14
+    >>> find_repeated_frequency([-1, -2, +1])
+    -3
     """
-    gen = frequency_generator(freqs)
+    # The frequencies reached during the first pass over the list, and the drift in frequency per pass.
+    # The frequency reached at step i of pass k is prefix[i] + k * total.
+    prefix = np.concatenate(([0], np.cumsum(freqs, dtype=np.int64)[:-1]))
+    total = frequency(freqs)
+
+    # If a frequency repeats during the first pass, it is the answer. Sorting stably by frequency, every entry that is
+    # equal to its predecessor is a repeat, and the earliest of these is the first.
+    order = np.argsort(prefix, kind='stable')
+    repeats = order[1:][np.diff(prefix[order]) == 0]
+    if repeats.size > 0:
+        return int(prefix[repeats.min()])
+    if total == 0:
+        return int(prefix[0])
+
+    # Otherwise, prefix[i] eventually reaches prefix[j] iff they are congruent modulo the drift, and prefix[j] lies
+    # in the direction of the drift. Work with the drift being positive, flipping the signs if necessary.
+    sign = 1 if total > 0 else -1
+    drift = sign * total
+    values = sign * prefix
+    residues = values % drift
 
-    s = set()
-    freq = 0
-    while freq not in s:
-        s.add(freq)
-        freq += next(gen)
-    return freq
+    # Sort by residue and then by value, so that each residue forms a contiguous run in increasing order.
+    # Within a run, each frequency first repeats when it reaches the next largest frequency, after the difference
+    # between them divided by the drift passes. Find the one that does so at the earliest step.
+    order = np.lexsort((values, residues))
+    values, residues = values[order], residues[order]
+    same_residue = residues[1:] == residues[:-1]
+    if not same_residue.any():
+        return None
+    steps = order[:-1] + np.diff(values) // drift * len(freqs)
+    best = np.where(same_residue, steps, np.iinfo(np.int64).max).argmin()
+    return int(sign * values[best + 1])
 
 
 if __name__ == '__main__':
     day = 1
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
-    frequencies = list(map(int, data.split('\n')))
+    data = get_input(day, session)
+    frequencies = np.loadtxt(io.StringIO(data), dtype=np.int64, ndmin=1)
 
     a1 = frequency(frequencies)
     print('a1 = %r' % a1)
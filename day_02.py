@@ -3,7 +3,9 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+from collections import Counter
 
 
 def calculate_package_checksum(packages):
@@ -19,14 +21,10 @@ def calculate_package_checksum(packages):
 
     twocount, threecount = 0, 0
     for package in packages:
-        # Make a map according to num letters.
-        letters = {}
-        for letter in package:
-            letters.setdefault(letter, 0)
-            letters[letter] += 1
-
-        twocount += 1 if 2 in letters.values() else 0
-        threecount += 1 if 3 in letters.values() else 0
+        # Count the occurrences of each letter.
+        letter_counts = Counter(package).values()
+        twocount += 2 in letter_counts
+        threecount += 3 in letter_counts
 
     return twocount * threecount
 
@@ -41,10 +39,14 @@ def find_close_packages(packages):
     'fgij'
     """
 
-    for p1, p2 in [(packages[i], packages[j]) for i in range(len(packages)) for j in range(i, len(packages))]:
-        common_letters = [p[0] for p in zip(p1, p2) if p[0] == p[1]]
-        if len(common_letters) == len(p1) - 1:
-            return ''.join(common_letters)
+    # Two packages differ in exactly one position k iff they are distinct and agree once position k is removed.
+    for k in range(len(packages[0]) if packages else 0):
+        seen = {}
+        for package in packages:
+            key = package[:k] + package[k+1:]
+            if seen.get(key, package) != package:
+                return key
+            seen[key] = package
 
     return None
 
@@ -52,7 +54,7 @@ def find_close_packages(packages):
 if __name__ == '__main__':
     day = 2
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     package_list = data.split('\n')
 
     a1 = calculate_package_checksum(package_list)
@@ -3,7 +3,9 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
 import re
 
 
@@ -131,40 +133,75 @@ class FabricCut:
         return str(self.id)
 
 
+def parse_fabric_cuts(data):
+    """
+    Parse all of the fabric cuts in the input with a single regex scan into columns.
+    :param data: the line-separated string representations of the fabric cuts
+    :return: a tuple of arrays (ids, lefts, tops, widths, heights)
+
+    >>> [c.tolist() for c in parse_fabric_cuts('#1 @ 1,3: 4x4\\n#2 @ 3,1: 4x5')]
+    [[1, 2], [1, 3], [3, 1], [4, 4], [4, 5]]
+    """
+    return tuple(np.array(FabricCut.matcher.findall(data), dtype=np.int32).reshape(-1, 5).T)
+
+
+def fabric_counts(fabric_cuts):
+    """
+    Stamp each of the fabric cuts onto a grid covering all of them, counting how many cuts cover each square inch.
+    :param fabric_cuts: the fabric cuts as returned by parse_fabric_cuts
+    :return: a 2D array where entry (x, y) is the number of fabric cuts covering square inch (x, y)
+
+    >>> fabric_counts(parse_fabric_cuts('#1 @ 1,0: 2x1\\n#2 @ 2,0: 1x2')).tolist()
+    [[0, 0], [1, 0], [2, 1]]
+    >>> fabric_counts(parse_fabric_cuts('')).shape
+    (0, 0)
+    """
+    _, lefts, tops, widths, heights = fabric_cuts
+    rights, bottoms = (lefts + widths).tolist(), (tops + heights).tolist()
+    # No square inch can be covered by more cuts than there are, so use the smallest dtype that can hold that count to
+    # keep the grid small.
+    counts = np.zeros((max(rights, default=0), max(bottoms, default=0)), dtype=np.min_scalar_type(len(lefts)))
+    for left, top, right, bottom in zip(lefts.tolist(), tops.tolist(), rights, bottoms):
+        counts[left:right, top:bottom] += 1
+    return counts
+
+
 def total_intersection_size(fabric_cuts):
     """
     Determine the total size of the intersection of a list of fabric cuts.
-    :param fabric_cuts: the list of fabric cuts
+    :param fabric_cuts: the fabric cuts as returned by parse_fabric_cuts
     :return: the total size of the intersection
 
-    >>> fabric_cuts = [FabricCut('#1 @ 1,3: 4x4'), FabricCut('#2 @ 3,1: 4x4'), FabricCut('#3 @ 5,5: 2x2'), FabricCut('#4 @ 3,4: 2x2')]
+    >>> fabric_cuts = parse_fabric_cuts('#1 @ 1,3: 4x4\\n#2 @ 3,1: 4x4\\n#3 @ 5,5: 2x2\\n#4 @ 3,4: 2x2')
     >>> total_intersection_size(fabric_cuts)
     6
     """
-    s = set()
-    for i in range(len(fabric_cuts) - 1):
-        for j in range(i+1, len(fabric_cuts)):
-            s.update(fabric_cuts[i].intersection(fabric_cuts[j]))
-    return len(s)
+    return int((fabric_counts(fabric_cuts) >= 2).sum())
 
 
 def find_nonintersecting_regions(fabric_cuts):
     """
     Find the one set - if it exists - in fabric_cuts that does not intersect any other.
-    :param fabric_cuts: the list of fabric cuts
-    :return:
+    :param fabric_cuts: the fabric cuts as returned by parse_fabric_cuts
+    :return: the id of the fabric cut that does not intersect any other, or None if there is no such cut
+
+    >>> fabric_cuts = parse_fabric_cuts('#1 @ 1,3: 4x4\\n#2 @ 3,1: 4x4\\n#3 @ 5,5: 2x2')
+    >>> find_nonintersecting_regions(fabric_cuts)
+    3
     """
-    for i in range(len(fabric_cuts)):
-        if {fabric_cuts[i].intersects(fabric_cuts[j]) for j in range(len(fabric_cuts)) if i != j} == {False}:
-            return fabric_cuts[i].id
+    # A cut intersects no other if it is the only cut covering every square inch in its area.
+    counts = fabric_counts(fabric_cuts)
+    for fc_id, left, top, width, height in zip(*(c.tolist() for c in fabric_cuts)):
+        if (counts[left:left + width, top:top + height] == 1).all():
+            return fc_id
     return None
 
 
 if __name__ == '__main__':
     day = 3
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
-    fabric_cuts = list(map(FabricCut, data.split('\n')))
+    data = get_input(day, session)
+    fabric_cuts = parse_fabric_cuts(data)
 
     a1 = total_intersection_size(fabric_cuts)
     print('a1 = %r' % a1)
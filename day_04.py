@@ -3,15 +3,17 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
-import re
+import numpy as np
 
 
 def parse_schedule(schedule):
     """
     Given a list of sorted scheduling information, produce a list of the guard sleep schedules.
     :param schedule: a list of sorted strings describing scheduling information
-    :return: a dictionary from guard ID to array of length 60 indicating how many times the guard slept at that minute
+    :return: a pair (guard ids, sleep table), where the guard ids are in order of first appearance, and row i of the
+             G x 60 sleep table indicates how many times guard i slept at each minute
 
     >>> schedule = []
     >>> schedule.append('[1518-11-01 00:00] Guard #10 begins shift')
@@ -31,58 +33,68 @@ def parse_schedule(schedule):
     >>> schedule.append('[1518-11-05 00:03] Guard #99 begins shift')
     >>> schedule.append('[1518-11-05 00:45] falls asleep')
     >>> schedule.append('[1518-11-05 00:55] wakes up')
-    >>> parse_schedule(schedule)
-    {10: [0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0], 99: [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 2, 3, 2, 2, 2, 2, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0]}
+    >>> guard_ids, sleep_table = parse_schedule(schedule)
+    >>> guard_ids.tolist()
+    [10, 99]
+    >>> sleep_table.tolist()
+    [[0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 2, 3, 2, 2, 2, 2, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0]]
     """
-    mutable_schedule = schedule[:]
-    date_matcher = re.compile("\[(?P<year>\d+)-(?P<month>\d+)-(?P<day>\d+) 00:(?P<minute>\d\d)\].*")
-    guard_matcher= re.compile(".*Guard #(?P<guard_id>\d+).*")
-
-    # We want to map a guard to a dict of length 60, which contains the number of minutes a guard slept on a current
-    # minute over the entire schedule.
-    guard_sleep_schedule = {}
-
-    while len(mutable_schedule) > 0:
-        schedule_line = mutable_schedule.pop(0)
-        guard_match = guard_matcher.match(schedule_line)
-        if guard_match is None:
-            raise ValueError('Unexceoect line: "{}"'.format(schedule_line))
-
-        guard = int(guard_match.group('guard_id'))
-        guard_sleep_schedule.setdefault(guard, [0] * 60)
-
-        if len(mutable_schedule) == 0:
-            break
-
-        # Keep parsing lines until we get another Guard line.
-        # If we get a falls asleep line, it must be followed by a
-        while len(mutable_schedule) > 0 and 'Guard' not in mutable_schedule[0]:
-            # Get the falls asleep line.
-            sleep_line = mutable_schedule.pop(0)
-            date_match = date_matcher.match(sleep_line)
-            if 'asleep' not in sleep_line or date_match is None or len(mutable_schedule) == 0:
-                raise ValueError('Unexpected line: {}'.format(sleep_line))
-            sleep_start = int(date_match.group('minute'))
-
-            # Get the wakes up line.
-            wake_line = mutable_schedule.pop(0)
-            date_match = date_matcher.match(wake_line)
-            if 'wakes' not in wake_line or date_match is None:
-                raise ValueError('Unexpected line: {}'.format(wake_line))
-            sleep_end = int(date_match.group('minute'))
-
-            for i in range(sleep_start, sleep_end):
-                guard_sleep_schedule[guard][i] += 1
-
-    return guard_sleep_schedule
+    # Every line has the same fixed layout, e.g.:
+    #   [1518-11-01 00:05] falls asleep
+    #   [1518-11-01 23:58] Guard #99 begins shift
+    # so the minute is at [15:17], the first letter of the event is at [19], and a guard id starts at [26].
+
+    # Assign each guard a row in the sleep table in order of first appearance, and collect the sleep intervals as
+    # triples (row, start minute, end minute).
+    guard_index = {}
+    sleep_intervals = []
+
+    # Walk the schedule once: a Guard line changes the current guard, and each falls asleep line must be followed by
+    # a wakes up line.
+    guard = None
+    sleep_start = None
+    for schedule_line in schedule:
+        event = schedule_line[19:20]
+        minute = int(schedule_line[15:17])
+
+        if event == 'G':
+            if sleep_start is not None:
+                raise ValueError('Unexpected line: "{}"'.format(schedule_line))
+            guard_id = int(schedule_line[26:schedule_line.index(' ', 26)])
+            guard = guard_index.setdefault(guard_id, len(guard_index))
+
+        elif event == 'f':
+            if guard is None or sleep_start is not None:
+                raise ValueError('Unexpected line: "{}"'.format(schedule_line))
+            sleep_start = minute
+
+        elif event == 'w':
+            if sleep_start is None:
+                raise ValueError('Unexpected line: "{}"'.format(schedule_line))
+            sleep_intervals.append((guard, sleep_start, minute))
+            sleep_start = None
+
+        else:
+            raise ValueError('Unexpected line: "{}"'.format(schedule_line))
+
+    if sleep_start is not None:
+        raise ValueError('Schedule ends with a guard asleep')
+
+    # The sleep table has a row per guard, containing the number of times that guard slept on a given minute over the
+    # entire schedule.
+    sleep_table = np.zeros((len(guard_index), 60), dtype=np.int32)
+    for guard, sleep_start, sleep_end in sleep_intervals:
+        sleep_table[guard, sleep_start:sleep_end] += 1
+
+    return np.array(list(guard_index), dtype=np.int32), sleep_table
 
 
 def find_best_prospect(guard_sleep_schedule):
     """
-    Given a guard sleep schedule, which is a dictionary of guard id to lists length 60 showing the number of minutes
-    they spent sleeping during the hour starting at midnight, find the sleepiest guard, and the minute he is most
-    likely to be asleep.
-    :param guard_sleep_schedule: the guard_sleep_schedule
+    Given a guard sleep schedule, which is a pair of guard ids and a table of rows of length 60 showing the number of
+    minutes they spent sleeping during the hour starting at midnight, find the sleepiest guard, and the minute he is
+    most likely to be asleep.
+    :param guard_sleep_schedule: the guard_sleep_schedule as returned by parse_schedule
     :return: a pair (guard id, minute)
 
     >>> schedule = []
@@ -106,18 +118,17 @@ def find_best_prospect(guard_sleep_schedule):
     >>> find_best_prospect(parse_schedule(schedule))
     (10, 24)
     """
-    guard_id = max(guard_sleep_schedule, key=lambda x: sum(guard_sleep_schedule[x]))
-    sleep_schedule = guard_sleep_schedule[guard_id]
-    minute = max(zip(sleep_schedule, range(60)))[1]
-    return guard_id, minute
+    guard_ids, sleep_table = guard_sleep_schedule
+    guard = sleep_table.sum(axis=1).argmax()
+    return int(guard_ids[guard]), int(sleep_table[guard].argmax())
 
 
 def find_most_predictable_guard(guard_sleep_schedule):
     """
-    Given a guard sleep schedule, which is a dictionary of guard id to lists length 60 showing the number of minutes
-    they spent sleeping during the hour starting at midnight, find the guard with the highest number of sleeps for a
-    given minute.
-    :param guard_sleep_schedule: the guard_sleep_schedule
+    Given a guard sleep schedule, which is a pair of guard ids and a table of rows of length 60 showing the number of
+    minutes they spent sleeping during the hour starting at midnight, find the guard with the highest number of sleeps
+    for a given minute.
+    :param guard_sleep_schedule: the guard_sleep_schedule as returned by parse_schedule
     :return: a pair(guard id, minute)
 
     >>> schedule = []
@@ -141,16 +152,15 @@ def find_most_predictable_guard(guard_sleep_schedule):
     >>> find_most_predictable_guard(parse_schedule(schedule))
     (99, 45)
     """
-    # Map the guards to their max sleep minute
-    max_sleeps = {guard_id: max(zip(guard_sleep_schedule[guard_id], range(60)))[1] for guard_id in guard_sleep_schedule}
-    max_guard = max(max_sleeps, key=lambda x: guard_sleep_schedule[x][max_sleeps[x]])
-    return max_guard, max_sleeps[max_guard]
+    guard_ids, sleep_table = guard_sleep_schedule
+    guard, minute = np.unravel_index(sleep_table.argmax(), sleep_table.shape)
+    return int(guard_ids[guard]), int(minute)
 
 
 if __name__ == '__main__':
     day = 4
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     schedule = parse_schedule(sorted(data.split('\n')))
 
     a1 = find_best_prospect(schedule)
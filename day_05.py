@@ -3,21 +3,60 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
+from numba import njit, prange
 
 
-def flip(c):
+@njit(cache=True)
+def _reduce(buf, ignore_mask):
     """
-    Flip a character's polarity, i.e. a maps to A, B maps to b, etc.
-    :param c: the single character
-    :return: the reversed character wrt case
-
-    >>> flip('a')
-    'A'
-    >>> flip('B')
-    'b'
+    Reduce a polymer encoded as ASCII codes, skipping any codes flagged in ignore_mask.
+    Two units react if they differ only in the ASCII case bit, i.e. their XOR is 0x20, which for ASCII letters
+    means they are the same letter in opposite cases.
+    :param buf: the uint8 array of ASCII codes representing the polymer
+    :param ignore_mask: a boolean array of length 256 indicating the ASCII codes to drop
+    :return: the uint8 array of ASCII codes representing the reduced polymer
     """
-    return c.upper() if c.islower() else c.lower()
+    # This is easily done with a stack, which will represent the simplified polymer.
+    stack = np.empty_like(buf)
+    top = 0
+    for c in buf:
+        if ignore_mask[c]:
+            continue
+        if top > 0 and stack[top - 1] ^ c == 0x20:
+            top -= 1
+        else:
+            stack[top] = c
+            top += 1
+    return stack[:top]
+
+
+@njit(parallel=True, cache=True)
+def _reduced_lengths(buf, ignore_masks):
+    """
+    Reduce a polymer once for each of the ignore masks, in parallel.
+    :param buf: the uint8 array of ASCII codes representing the polymer
+    :param ignore_masks: a 2D boolean array, each row of which is an ignore mask as per _reduce
+    :return: the lengths of the reduced polymers
+    """
+    lengths = np.empty(ignore_masks.shape[0], dtype=np.int64)
+    for i in prange(ignore_masks.shape[0]):
+        lengths[i] = _reduce(buf, ignore_masks[i]).shape[0]
+    return lengths
+
+
+def _ignore_mask(ignore):
+    """
+    Create the mask used by _reduce to ignore a polymer and its companion of inverse polarity.
+    :param ignore: the polymer to ignore, or '' to ignore nothing
+    :return: a boolean array of length 256 indexed by ASCII code
+    """
+    mask = np.zeros(256, dtype=np.bool_)
+    for c in {ignore.lower(), ignore.upper()} - {''}:
+        mask[ord(c)] = True
+    return mask
 
 
 def simplify_polymer(polymer, ignore = ''):
@@ -40,18 +79,11 @@ def simplify_polymer(polymer, ignore = ''):
     'aabAAB'
     >>> simplify_polymer('dabAcCaCBAcCcaDA')
     'dabCBAcaDA'
+    >>> simplify_polymer('dabAcCaCBAcCcaDA', 'C')
+    'daDA'
     """
-    # This is easily done with a stack, which will represent the simplified polymer.
-    stack = []
-    for p in polymer:
-        if p.lower() == ignore or p.upper() == ignore:
-            continue
-        if len(stack) > 0 and stack[-1] == flip(p):
-            stack.pop()
-        else:
-            stack.append(p)
-
-    return ''.join(stack)
+    buf = np.frombuffer(polymer.encode('ascii'), dtype=np.uint8)
+    return _reduce(buf, _ignore_mask(ignore)).tobytes().decode('ascii')
 
 
 def ignore_troublesome_polymer(polymer):
@@ -63,14 +95,22 @@ def ignore_troublesome_polymer(polymer):
     >>> ignore_troublesome_polymer('dabAcCaCBAcCcaDA')
     'daDA'
     """
-    s = set(polymer.lower())
-    return min([simplify_polymer(polymer, i) for i in s], key=lambda p: len(p))
+    # Reduction is confluent, so ignoring a polymer in the already simplified polymer gives the same result as
+    # ignoring it in the original, and the simplified polymer is much shorter.
+    simplified = simplify_polymer(polymer)
+    candidates = sorted(set(simplified.lower()))
+    if not candidates:
+        return simplified
+
+    buf = np.frombuffer(simplified.encode('ascii'), dtype=np.uint8)
+    lengths = _reduced_lengths(buf, np.array([_ignore_mask(i) for i in candidates]))
+    return simplify_polymer(simplified, candidates[int(lengths.argmin())])
 
 
 if __name__ == '__main__':
     day = 5
     session = aocd.get_cookie()
-    polymer = aocd.get_data(session=session, year=2018, day=day)
+    polymer = get_input(day, session)
 
     a1 = len(simplify_polymer(polymer))
     print('a1 = %r' % a1)
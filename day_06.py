@@ -3,7 +3,37 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
+from numba import njit, int32, void
+
+
+@njit(void(int32[:], int32[:], int32[:, :], int32[:, :]), cache=True)
+def _fill_owners(xs, ys, owners, best):
+    """
+    For every position (x, y) in the bounding box, find the index of the point closest to it via the Manhattan metric,
+    storing it in owners[x][y], and its distance in best[x][y]. If two or more points are minimally equidistant to
+    (x, y), then owners[x][y] is set to -1.
+    :param xs: the adjusted x coordinates of the points
+    :param ys: the adjusted y coordinates of the points
+    :param owners: the output array of point indices, of the dimensions of the bounding box
+    :param best: the output array of minimum distances, of the dimensions of the bounding box
+    """
+    width, height = owners.shape
+    owners[:, :] = 0
+    best[:, :] = width + height + 2
+    for p in range(xs.shape[0]):
+        cx, cy = xs[p], ys[p]
+        for x in range(width):
+            dx = abs(cx - x)
+            for y in range(height):
+                dist = dx + abs(cy - y)
+                if dist == best[x, y]:
+                    owners[x, y] = -1
+                elif dist < best[x, y]:
+                    owners[x, y] = p
+                    best[x, y] = dist
 
 
 def bounding_box_pt(coords):
@@ -36,57 +66,30 @@ def bounding_box_pt(coords):
     # Find the largest delta in x coordinates in x-values and y-values, which we use as the dimensions of the
     # bounding box.
     numps = len(coords)
-    xs, ys = list(zip(*coords))
-    xmin, xmax = min(xs), max(xs)
-    ymin, ymax = min(ys), max(ys)
+    xs, ys = (np.array(c, dtype=np.int32) for c in zip(*coords))
 
     # Adjust the coordinates so that they fall within the bounding box.
-    coords_adj = [(x - xmin, y - ymin) for (x, y) in coords]
-
-    # Set up an array (x, y) for all points in the bounding box, holding a pair (p, d) such that:
-    # - p indicates the index of the point closest to adjusted position (x, y); and
-    # - d indicates the distance via the Manhattan metric from point p to adjusted position (x, y).
-    # If two points are minimally equidistant to (x, y), then we set its p to -1, indicating that it is
-    # out of play.
-    # minpts[x][y] holds pair (p, d) representing the minimum distance seen so far, as point p having distance d.
-    minpts = [[(0, xmax + ymax + 2)] * (ymax - ymin + 1) for _ in range(xmax - xmin + 1)]
-
-    # Iterate over all the adjusted coordinates, find their distances to the (x, y) positions, and determine if
-    # this is better, or minimally equidistant, in which case, we set the point to -1.
-    for (p, c) in zip(range(len(coords_adj)+1), coords_adj):
-
-        # p is the point index, and c are the adjusted coordinates.
-        cx, cy = c
-
-        # Iterate over all the points in the bounding box and check to see if we should modify minpts by the above
-        # stated rules.
-        for (x,y) in [(x, y) for x in range(xmax - xmin + 1) for y in range(ymax - ymin + 1)]:
-            # The Manhattan distance from p to (x, y).
-            dist = abs(cx - x) + abs(cy - y)
-
-            # Minimally equidistant: set the point idx to -1.
-            if dist == minpts[x][y][1]:
-                minpts[x][y] = (-1, dist)
-            elif dist < minpts[x][y][1]:
-                minpts[x][y] = (p, dist)
-
-    # We are no longer interested in distances, so drop the distance parameter and keep only the point.
-    pts = [[e[0] for e in L1] for L1 in minpts]
-
-    # Count the number of cells "won" by each point.
+    xs -= xs.min()
+    ys -= ys.min()
+    width, height = int(xs.max()) + 1, int(ys.max()) + 1
+
+    # pts[x][y] holds the index of the point closest to adjusted position (x, y).
+    # If two points are minimally equidistant to (x, y), then it is set to -1, indicating that it is out of play.
+    pts = np.empty((width, height), dtype=np.int32)
+    _fill_owners(xs, ys, pts, np.empty_like(pts))
+
+    # Count the number of cells "won" by each point, where pcounts[p + 1] is the count for point p, and pcounts[0] is
+    # the count of the equidistant cells, which are won by no point.
     # If a point lands on the outer border, it falls in an infinite area and is not a viable candidate.
-    # It seems like we need the + 1 here to consider the last point for its area.
-    # See the example above in bounding_box_pt doctests.
-    pcounts = [0] * (numps + 1)
-    for (x, y) in [(x, y) for x in range(xmax - xmin + 1) for y in range(ymax - ymin + 1)]:
-        p = pts[x][y]
-        if x == 0 or y == 0 or x == xmax - xmin or y == ymax - ymin:
-            pcounts[p] = -1
-        elif pcounts[p] >= 0:
-            pcounts[p] += 1
+    border = np.zeros((width, height), dtype=bool)
+    border[0, :] = border[-1, :] = True
+    border[:, 0] = border[:, -1] = True
+    pcounts = np.bincount(pts[~border] + 1, minlength=numps + 1)
+    pcounts[np.unique(pts[border]) + 1] = -1
+    pcounts[0] = -1
 
     # Now find the index of the point occurring in the maximum finite area.
-    maxdist = max(pcounts)
+    maxdist = int(pcounts.max())
 
     # If the max dist is -1, then no point wins. All are infinitely large.
     if maxdist == -1:
@@ -106,35 +109,24 @@ def region_within(coords, dist):
     >>> region_within([(1, 1), (6, 1), (3, 8), (4, 3), (5, 5), (9, 8)], 32)
     16
     """
-    # Remove all the x and y distances from dist to see how big the bounding box should be.
-    # There is plenty of room for improvement here, especially since in my example data, ybound before taking the max
-    # with 0 is negative, which means only inner points from a distance of that much from the outermost point is a
-    # candidate. I'm just being slightly intellectually lazy here due to time constaints.
-    xmin, xmax = min(x for x, _ in coords), max(x for x, _ in coords)
-    ymin, ymax = min(y for _, y in coords), max(y for _, y in coords)
-    xbound = max(0, dist - sum(x for x, _ in coords))
-    ybound = max(0, dist - sum(y for _, y in coords))
-
-    # Adjust the points.
-    adjcoords = [(x + xbound, y + ybound) for x, y in coords]
-
-    numpoints = 0
-    for x in range(0, xmax + xbound):
-        for y in range(0, ymax + ybound):
-            currdist = 0
-            for cx, cy in adjcoords:
-                currdist += abs(x - cx) + abs(y - cy)
-                if currdist >= dist:
-                    break
-            if currdist < dist:
-                numpoints += 1
-    return numpoints
+    # The summed distance separates into a sum of x distances and a sum of y distances.
+    # If x lies more than dist / len(coords) outside of the coordinates in the x direction, then its x distances alone
+    # sum to at least dist, so pad the bounding box by this amount on all sides.
+    xs, ys = (np.array(c, dtype=np.int64) for c in zip(*coords))
+    pad = dist // len(coords) + 1
+    xrange = np.arange(xs.min() - pad, xs.max() + pad + 1)
+    yrange = np.arange(ys.min() - pad, ys.max() + pad + 1)
+
+    # Sum the x distances for each x and the y distances for each y separately, and then combine them over the grid.
+    xdists = np.abs(xs[:, None] - xrange[None, :]).sum(axis=0)
+    ydists = np.abs(ys[:, None] - yrange[None, :]).sum(axis=0)
+    return int((xdists[:, None] + ydists[None, :] < dist).sum())
 
 
 if __name__ == '__main__':
     day = 6
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     coords = [tuple(map(int, x.split(', '))) for x in data.split('\n')]
 
     a1 = bounding_box_pt(coords)
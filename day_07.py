@@ -3,6 +3,7 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
 import copy
 
@@ -146,7 +147,7 @@ def parallel_worker_time(step_dict, num_workers, min_time):
 if __name__ == '__main__':
     day = 7
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     step_dicts = create_step_dict(extract_step_data(data))
 
     a1 = step_order(step_dicts)
@@ -3,14 +3,53 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
+from numba import njit, int64
 
 
-class Marble:
-    def __init__(self, value=0, left=None, right=None):
-        self.value = value
-        self.left = self if left is None else left
-        self.right = self if right is None else right
+@njit(int64(int64, int64), cache=True)
+def _highest_score(num_players, upper_marble):
+    """
+    The compiled marble game, as described in calculate_highest_score.
+    The circle is a doubly linked list of the marbles stored in two arrays indexed by marble, where left[m] and
+    right[m] are the marbles counterclockwise and clockwise of marble m respectively.
+    """
+    left = np.zeros(upper_marble + 1, dtype=np.int32)
+    right = np.zeros(upper_marble + 1, dtype=np.int32)
+    scores = np.zeros(num_players, dtype=np.int64)
+    current_marble = 0
+
+    for new_marble in range(1, upper_marble + 1):
+        # If multiple of 23, add to score, and look back seven marbles, add to score, and remove.
+        # The marble clockwise of the removed one becomes current. The walk is unrolled into a straight chain of loads.
+        if new_marble % 23 == 0:
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            current_marble = left[current_marble]
+            scores[new_marble % num_players] += new_marble + current_marble
+            a = left[current_marble]
+            b = right[current_marble]
+            right[a] = b
+            left[b] = a
+            current_marble = b
+
+        # Otherwise, insert the marble between the ones 1 and 2 clockwise of the current marble.
+        else:
+            a = right[current_marble]
+            b = right[a]
+            left[new_marble] = a
+            right[new_marble] = b
+            right[a] = new_marble
+            left[b] = new_marble
+            current_marble = new_marble
+
+    return scores.max()
 
 
 def calculate_highest_score(num_players, upper_marble):
@@ -39,42 +78,13 @@ def calculate_highest_score(num_players, upper_marble):
     >>> calculate_highest_score(30, 5807)
     37305
     """
-
-    base = Marble()
-    current_marble = base
-
-    scores = [0] * num_players
-    current_player = 1
-
-    for new_marble in range(1, upper_marble + 1):
-        # if new_marble % 100 == 0:
-        #     print("{} / {}".format(new_marble, upper_marble + 1))
-        # If multiple of 23, add to score, and look back seven marbles, add to score, and remove.
-        if new_marble % 23 == 0:
-            for _ in range(7):
-                current_marble = current_marble.left
-            scores[current_player] += new_marble + current_marble.value
-
-            # Remove current marble and become next marble.
-            current_marble.left.right = current_marble.right
-            current_marble.right.left = current_marble.left
-            current_marble = current_marble.right
-
-        else:
-            m = Marble(value=new_marble, left=current_marble.right, right=current_marble.right.right)
-            current_marble.right.right.left = m
-            current_marble.right.right = m
-            current_marble = m
-
-        current_player = (current_player + 1) % num_players
-
-    return max(scores)
+    return int(_highest_score(num_players, upper_marble))
 
 
 if __name__ == '__main__':
     day = 9
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day).split()
+    data = get_input(day, session).split()
     players = int(data[0])
     highest_marble = int(data[6])
 
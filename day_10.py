@@ -3,100 +3,99 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
-import re
+import io
+import numpy as np
 
 
-class Point:
+def parse_points(data):
     """
-    A Point, which consists of an initial position and a velocity.
-    """
-    def __init__(self, position, velocity):
-        self._position = position
-        self._velocity = velocity
-
-    def at_time(self, t):
-        return self._position[0] + t * self._velocity[0], self._position[1] + t * self._velocity[1]
-
-    def __repr__(self):
-        return "Point(p=({},{}), v=({},{}))".format(*(self._position + self._velocity))
-
-
-def parse_point(line):
-    """
-    Parse a Point from an input line.
-    :param line: the input line
-    :return: the parsed Point object
+    Parse the points from the input, where each line consists of an initial position and a velocity.
+    :param data: the input data
+    :return: a pair of N x 2 arrays, the positions and the velocities
 
-    >>> parse_point('position=<-3, 11> velocity=< 1, -2>')
-    Point(p=(-3,11), v=(1,-2))
+    >>> pos, vel = parse_points('position=<-3, 11> velocity=< 1, -2>\\nposition=< 7,  0> velocity=<-1,  0>\\n')
+    >>> pos.tolist(), vel.tolist()
+    ([[-3, 11], [7, 0]], [[1, -2], [-1, 0]])
     """
-    # Given a line, parse the position and the velocity.
-    match = re.match('position=<\s*(?P<px>-?\d+),\s*(?P<py>-?\d+)>\s*velocity=<\s*(?P<vx>-?\d+)\s*,\s*(?P<vy>-?\d+)>',
-                     line)
-    if match is None:
-        raise ValueError("Illegal line format: %s" % line)
+    # Parse all the lines in one pass into a structured array, and view it as an N x 4 array.
+    pattern = r'position=<\s*(-?\d+),\s*(-?\d+)>\s*velocity=<\s*(-?\d+)\s*,\s*(-?\d+)>'
+    dtype = [('px', np.int64), ('py', np.int64), ('vx', np.int64), ('vy', np.int64)]
+    points = np.fromregex(io.StringIO(data), pattern, dtype=dtype).view(np.int64).reshape(-1, 4)
+    if len(points) != sum(1 for line in data.split('\n') if line.strip()):
+        raise ValueError("Illegal line format in input")
 
-    return Point((int(match['px']), int(match['py'])), (int(match['vx']), int(match['vy'])))
+    return points[:, :2], points[:, 2:]
 
 
-def positions_at_t(points, t):
+def positions_at_t(pos, vel, t):
     """
-    Given a list of Points and a time t, find their positions at time t
-    :param points: the list of Points
+    Given the positions and velocities of the points and a time t, find their positions at time t
+    :param pos: the initial positions of the points
+    :param vel: the velocities of the points
     :param t: the time t
-    :return: a list of pairs indicating the position of the points at time t
+    :return: an N x 2 array of the positions of the points at time t
     """
-    return [p.at_time(t) for p in points]
+    return pos + t * vel
 
 
-def distance_at_t(points, t):
+def bounding_box_size_at_t(pos, vel, t):
     """
-    Determine the sum of all the distances of the Points at time t using the easy-to-calculate Manhattan metric.
-    We could use the Euclidean metric but the extra computation is entirely unnecessary.
-    :param points: the list of Points
+    Determine the size of the bounding box of the points at time t, as the sum of its width and height.
+    :param pos: the initial positions of the points
+    :param vel: the velocities of the points
     :param t: the time t
-    :return: the sum of the distances between all pairs of points for time t
-    """
-    positions_t = positions_at_t(points, t)
-    return sum([abs(p0[0] - p1[0]) + abs(p0[1] + p1[1]) for p0 in positions_t for p1 in positions_t])
-
+    :return: the width plus the height of the bounding box of the points at time t
 
-def draw_message(points):
-    # delta_t will be tuned to get t. A beginning value of 1000 for t is simply a guess; as long as we have a
-    # positive integer, the solution will emerge, but if too low, it will take a very long time.
-    t = 1
-    delta_t = 1000
+    >>> bounding_box_size_at_t(np.array([[0, 0], [4, 1]]), np.array([[1, 1], [-1, 0]]), 2)
+    1
+    """
+    positions_t = positions_at_t(pos, vel, t)
+    return int(np.ptp(positions_t[:, 0]) + np.ptp(positions_t[:, 1]))
 
-    # We look for the local minimum distance using a gradient descent algorithm.
-    while True:
-        # dist = distance_at_t(points, t)/len(points)
-        dist = distance_at_t(points, t)
 
-        # Sanity check to see if we are decreasing; if not, switch directions and decrease delta_t.
-        dist_prev = distance_at_t(points, t-1)
-        dist_next = distance_at_t(points, t+1)
+def find_message_time(pos, vel):
+    """
+    Find the time at which the points are closest together, which is when the message appears.
+    The size of the bounding box is a convex function of t, since each of its sides is the maximum or minimum of
+    linear functions of t, so we estimate the minimum in closed form and then walk downhill to the exact minimum.
+    :param pos: the initial positions of the points
+    :param vel: the velocities of the points
+    :return: the time t at which the bounding box of the points is smallest
+
+    >>> find_message_time(np.array([[0, 0], [10, 0], [5, 20]]), np.array([[1, 0], [-1, 0], [0, -4]]))
+    5
+    """
+    # The least-squares estimate of the time at which the points are most concentrated about their centroid.
+    centred_pos = pos - pos.mean(axis=0)
+    centred_vel = vel - vel.mean(axis=0)
+    speed = (centred_vel * centred_vel).sum()
+    t = max(0, int(round(-(centred_pos * centred_vel).sum() / speed))) if speed else 0
 
-        # Change directions?
-        if (delta_t > 0 and dist_prev < dist) or (delta_t < 0 and dist_next < dist):
-            delta_t = -int(delta_t / 2)
+    size = bounding_box_size_at_t(pos, vel, t)
+    while t > 0 and bounding_box_size_at_t(pos, vel, t - 1) < size:
+        t -= 1
+        size = bounding_box_size_at_t(pos, vel, t)
+    while bounding_box_size_at_t(pos, vel, t + 1) < size:
+        t += 1
+        size = bounding_box_size_at_t(pos, vel, t)
+    return t
 
-        # Inefficient way to check if we are at the local minimum.
-        if dist_prev >= dist and dist <= dist_next:
-            break
 
-        t += delta_t
+def draw_message(pos, vel):
+    t = find_message_time(pos, vel)
 
     # We now have the minimum distance time, t, and we can print the diagram.
-    pos = positions_at_t(points, t)
-    x_positions, y_positions = list(zip(*pos))
+    pos_t = positions_at_t(pos, vel, t).tolist()
+    x_positions, y_positions = list(zip(*pos_t))
     xmin, xmax = min(x_positions), max(x_positions)
     ymin, ymax = min(y_positions), max(y_positions)
     deltax = xmax - xmin + 1
     deltay = ymax - ymin + 1
 
     grid = [[' '] * deltax for _ in range(deltay)]
-    for p in pos:
+    for p in pos_t:
         xpos = p[0] - xmin
         ypos = p[1] - ymin
         grid[ypos][xpos] = '#'
@@ -113,7 +112,7 @@ def draw_message(points):
 if __name__ == '__main__':
     day = 10
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
-    data_points = [parse_point(line) for line in data.split('\n')]
+    data = get_input(day, session)
+    data_pos, data_vel = parse_points(data)
 
-    draw_message(data_points)
+    draw_message(data_pos, data_vel)
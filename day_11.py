@@ -3,13 +3,16 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
+from numba import njit, prange
 
 
 class SummedAreaTable:
     """
     Given a table, create a summed-area table for that table.
-    A summed-area table is a table where entry (x,y) contains the sum of table[i][j] for 0 <= i <= x and 0 <= j <= y.
+    A summed-area table is a table where entry (x,y) contains the sum of table[i][j] for 0 <= i < x and 0 <= j < y.
     This allows us to calculate the sum of elements in any rectangle of the original table with only at most four array
     lookups, i.e. O(1).
     """
@@ -18,25 +21,20 @@ class SummedAreaTable:
         Given a table, make a summed-area table for it and wrap it in a class for simplifying computation.
         :param table: the input table
         """
-        self.rows = len(table)
-        self.cols = len(table[0])
+        self.rows, self.cols = table.shape
 
-        # Create the summed-area table.
-        sa_table = [[0] * 300 for _ in range(300)]
-        sa_table[0][0] = table[0][0]
+        # Create the summed-area table, padded with a leading row and column of zeros so that entry (x, y) holds the
+        # sum of table[i][j] for 0 <= i < x and 0 <= j < y. This avoids any corner cases for the first row and column.
+        # Use 32-bit entries when every partial sum fits in them to halve the memory the compiled scans walk through.
+        dtype = np.int32 if np.abs(table).sum() <= np.iinfo(np.int32).max else np.int64
+        self._table = np.ascontiguousarray(np.pad(table.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0))), dtype=dtype)
 
-        # In order to not have to deal with avoiding negative values, calculate the first row and column explicitly.
-        for i in range(1, 300):
-            sa_table[i][0] = table[i][0] + sa_table[i - 1][0]
-            sa_table[0][i] = table[0][i] + sa_table[0][i - 1]
-
-        # Now the rest is trivially easy. Proceed over columns and then rows.
-        for row in range(1, self.rows):
-            for col in range(1, self.cols):
-                sa_table[row][col] = table[row][col] + sa_table[row][col - 1] + sa_table[row - 1][col]\
-                        - sa_table[row - 1][col - 1]
-
-        self._table = sa_table
+    @property
+    def table(self):
+        """
+        The padded summed-area table, where entry (x, y) holds the sum of table[i][j] for 0 <= i < x and 0 <= j < y.
+        """
+        return self._table
 
     def sum_of(self, x, y, width, height):
         """
@@ -48,6 +46,10 @@ class SummedAreaTable:
         :param width: width of the rectangle of summation
         :param height: height of the rectangle of summation
         :return: the sum of all the elements of the original table in the specified rectangle.
+
+        >>> sat = SummedAreaTable(np.arange(12).reshape(3, 4))
+        >>> sat.sum_of(0, 0, 4, 3), sat.sum_of(1, 1, 2, 2), sat.sum_of(2, 3, 1, 1)
+        (66, 30, 11)
         """
         if x < 0 or x >= self.rows or y < 0 or y >= self.cols:
             raise ValueError('Illegal table coordinates: ({},{})'.format(x, y))
@@ -56,21 +58,26 @@ class SummedAreaTable:
         if x + height > self.rows or y + width > self.cols:
             raise ValueError('Rectangle coordinates fall outside of table: ({},{})'.format(x + height, y + width))
 
-        # Calculate the area. If in the first row or column, just return the value to avoid corner cases with
-        # negative array indices.
-        if x == 0:
-            return self._table[0][y + width - 1] - self._table[0][y]
-        if y == 0:
-            return self._table[x + height - 1][0] - self._table[x][0]
+        t = self._table
+        return int(t[x + height, y + width] - t[x, y + width] - t[x + height, y] + t[x, y])
+
+    def square_sums(self, n):
+        """
+        Find the sums of the elements from the original table in all the n x n squares at once.
+        :param n: the dimensions of the squares
+        :return: an array whose entry (x, y) is the sum of the n x n square with top-left point (x, y)
 
-        # Otherwise, this is a normal case.
-        return self._table[x-1][y-1] + self._table[x + height - 1][y + width - 1] - self._table[x-1][y + width - 1] \
-            - self._table[x + height - 1][y-1]
+        >>> SummedAreaTable(np.arange(12).reshape(3, 4)).square_sums(2).tolist()
+        [[10, 14, 18], [26, 30, 34]]
+        """
+        t = self._table
+        return t[n:, n:] - t[:-n, n:] - t[n:, :-n] + t[:-n, :-n]
 
 
 def calculate_cell_power_level(x, y, serial):
     """
     Calculate the convoluted power level of a cell based on the formula provided.
+    This works equally on arrays of coordinates, giving the array of power levels, which is how the table is created.
     :param x: the x coordinate
     :param y: the y coordinate
     :param serial: the serial number of the device
@@ -87,12 +94,9 @@ def calculate_cell_power_level(x, y, serial):
     """
     rack_id = x + 10
     num = (rack_id * y + serial) * rack_id
-    if abs(num) < 100:
-        # There is no digit in the 100s position, so take it to be zero, and subtract five from it.
-        return -5
-    else:
-        # Fetch the digit in the 100s position and subtract five from it.
-        return int(str(num)[-3]) - 5
+
+    # Fetch the digit in the 100s position, which is zero if there is none, and subtract five from it.
+    return (abs(num) // 100) % 10 - 5
 
 
 def create_power_level_table(serial, width=300, height=300):
@@ -102,8 +106,12 @@ def create_power_level_table(serial, width=300, height=300):
     :param width: the width of the table
     :param height: the height of the table
     :return: A width x height array of power levels
+
+    >>> create_power_level_table(57)[122, 79].item(), create_power_level_table(39)[217, 196].item()
+    (-5, 0)
     """
-    return [[calculate_cell_power_level(x, y, serial) for y in range(width)] for x in range(height)]
+    x, y = np.mgrid[0:height, 0:width]
+    return calculate_cell_power_level(x, y, serial)
 
 
 def find_highest_powered_square(sa_table, n=3):
@@ -118,9 +126,33 @@ def find_highest_powered_square(sa_table, n=3):
     >>> find_highest_powered_square(SummedAreaTable(create_power_level_table(42)))
     (30, (21, 61))
     """
-    return max([(sa_table.sum_of(x, y, n, n), (x, y))
-                for x in range(sa_table.rows - n + 1)
-                for y in range(sa_table.cols - n + 1)])
+    sums = sa_table.square_sums(n)
+    x, y = divmod(int(sums.argmax()), sums.shape[1])
+    return int(sums[x, y]), (x, y)
+
+
+@njit(parallel=True, cache=True)
+def _highest_powered_squares(table):
+    """
+    For each size n, find the n x n square with the highest power level directly from the padded summed-area table.
+    The sizes are processed in parallel.
+    :param table: the padded summed-area table, as stored by SummedAreaTable
+    :return: three arrays, indexed by n - 1, of the highest power, and the x and y coordinates of the square achieving it
+    """
+    rows, cols = table.shape[0] - 1, table.shape[1] - 1
+    sizes = min(rows, cols)
+    best = np.empty(sizes, dtype=np.int64)
+    best_x = np.empty(sizes, dtype=np.int64)
+    best_y = np.empty(sizes, dtype=np.int64)
+    for i in prange(sizes):
+        n = i + 1
+        best[i], best_x[i], best_y[i] = table[n, n], 0, 0
+        for x in range(rows - n + 1):
+            for y in range(cols - n + 1):
+                power = table[x + n, y + n] - table[x, y + n] - table[x + n, y] + table[x, y]
+                if power > best[i]:
+                    best[i], best_x[i], best_y[i] = power, x, y
+    return best, best_x, best_y
 
 
 def find_highest_powered_of_all_squares(sa_table):
@@ -131,13 +163,15 @@ def find_highest_powered_of_all_squares(sa_table):
     >>> find_highest_powered_of_all_squares(SummedAreaTable(create_power_level_table(18)))
     ((113, (90, 269)), 16)
     """
-    return max([(find_highest_powered_square(sa_table, i), i) for i in range(1, 301)])
+    best, best_x, best_y = _highest_powered_squares(sa_table.table)
+    i = int(best.argmax())
+    return (int(best[i]), (int(best_x[i]), int(best_y[i]))), i + 1
 
 
 if __name__ == '__main__':
     day = 11
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     serial_data = int(data)
     satable = SummedAreaTable(create_power_level_table(serial_data))
 
@@ -6,38 +6,66 @@
 # 1D cellular automaton.
 
 
+from aoc_input import get_input
 import aocd
-from bitarray import bitarray
-
-
-def bitarray_to_int(bit_array):
-    """
-    Transform a bitarray into an int.
-    :param bit_array:
-    :return:
-    """
-    return int(bit_array.to01(), 2)
 
 
 class Pots:
     """
     This is strikingly similar to a 2D model of Conway's Game of Life.
     Every generation can add two plants to the right, and two to the left.
-    Thus if we start with n plants and g generations, our array of plants will be of size:
-       n + 2g + 2g = n + 4g
-    We take advantage of Python's negative indexing to put the pots on the left of 0 at the end of the array.
+    The state is stored as a single int, where bit i represents pot i - zero_pot_idx, so that a whole generation can be
+    computed with a handful of bitwise operations on the int rather than pot by pot.
     """
     def __init__(self, data):
         # Process the raw data
         lines = [l.strip().replace('.', '0').replace('#', '1') for l in data.split('\n') if l.strip() != '']
 
-        # Process the initial state, which is 15 chars into the first line.
-        self.initial_state = bitarray(lines.pop(0)[15:])
-        self._transitions = {bitarray_to_int(bitarray(line[0:5])): int(line[-1]) for line in lines}
+        # Process the initial state, which is 15 chars into the first line, as an int where bit i is pot i.
+        self.initial_state = int(lines.pop(0)[15:][::-1], 2)
+        self._transitions = {int(line[0:5], 2): int(line[-1]) for line in lines}
+
+        # The patterns of five pots that result in a plant. If fewer patterns result in an empty pot, match those
+        # instead and complement the result, which is only sound if five empty pots stay empty.
+        self._rules = [pattern for pattern in range(32) if self._transitions.get(pattern, 0)]
+        self._complement = len(self._rules) > 16 and 0 not in self._rules
+        if self._complement:
+            self._rules = [pattern for pattern in range(32) if not self._transitions.get(pattern, 0)]
 
     @staticmethod
     def _evaluate_state(state, zero_pot_idx):
-        return sum([i - zero_pot_idx for i, j in enumerate(state) if j])
+        # Peel off the lowest set bit at a time.
+        total = 0
+        while state:
+            lowest = state & -state
+            total += lowest.bit_length() - 1 - zero_pot_idx
+            state ^= lowest
+        return total
+
+    def _next_generation(self, state):
+        """
+        Calculate the next generation from a state.
+        :param state: the state, as an int
+        :return: the next state, where bit i represents the pot represented by bit i - 2 of state
+        """
+        # Make room for two new pots on the left and the right. Then bit i of windows[d] is the pot at offset d - 2
+        # from the pot represented by bit i of the next state, i.e. position 4 - d in the pattern for that pot.
+        width = state.bit_length() + 4
+        mask = (1 << width) - 1
+        windows = [(state << 4) >> d for d in range(5)]
+        inverted = [~window & mask for window in windows]
+        selected = [inverted, windows]
+
+        # Precompute lookups of the matches for every value of the first two, middle two, and last pots of a pattern,
+        # so that each pattern needs only two ANDs of precomputed masks.
+        firsts = [selected[v >> 1][0] & selected[v & 1][1] for v in range(4)]
+        middles = [selected[v >> 1][2] & selected[v & 1][3] for v in range(4)]
+        lasts = [inverted[4], windows[4]]
+
+        next_state = 0
+        for pattern in self._rules:
+            next_state |= firsts[pattern >> 3] & middles[(pattern >> 1) & 3] & lasts[pattern & 1]
+        return ~next_state & mask if self._complement else next_state
 
     def run_simulation(self, generations=20):
         """
@@ -47,74 +75,50 @@ class Pots:
 
         >>> init_data = '''initial state: #..#.#..##......###...###\\n\\n...## => #\\n..#.. => #\\n.#... => #\\n.#.#. => #\\n.#.## => #\\n.##.. => #\\n.#### => #\\n#.#.# => #\\n#.### => #\\n##.#. => #\\n##.## => #\\n###.. => #\\n###.# => #\\n####. => #\\n'''
         >>> p = Pots(init_data)
-        >>> p.run_simulation(500)
+        >>> p.run_simulation()
         325
+        >>> p.run_simulation(500)
+        9374
         """
-        # Start at the first position after the empty left pots.
-        state = self.initial_state[:]
-
-        # We will reach a state of stability where the string keeps moving right.
+        # The initial state, where the first pot is pot 0, in bit 0.
+        state = self.initial_state
         zero_pot_idx = 0
-        cyclic_generation = 0
-        cyclic_diff = 0
-
-        for generation in range(generations):
-            prev_state_string = state.to01().strip('0')
-
-            # We need the state to have five empty pots on the left and five empty pots on the right.
-            state_string = state.to01()
-            # print('{}: {}'.format(generation, state_string.replace('0', '.').replace('1', '#')))
-            if state_string[:5].find('1') == -1:
-                left_zeros_to_add = 0
-            else:
-                left_zeros_to_add = 5 - state_string[:5].index('1')
-            if state_string[-5:].find('1') == -1:
-                right_zeros_to_add = 0
-            else:
-                right_zeros_to_add = 5 - state_string[-5:][::-1].index('1')
-
-            # For processing simplicity, make state the same length as newstate.
-            state = bitarray('0' * left_zeros_to_add) + state[:] + bitarray('0' * right_zeros_to_add)
-            newstate = state[:]
-
-            # The zero pot has migrated right by left_zeros_to_add
-            zero_pot_idx += left_zeros_to_add
-
-            for x in range(2, len(newstate) - 2):
-                # Grab the slice from the current state and find it in the transitions to set the state
-                # at position x.
-                substate = state[x-2:x+3]
-
-                lookup = bitarray_to_int(substate)
-                if lookup not in self._transitions:
-                    newstate[x] = 0
-                else:
-                    newstate[x] = self._transitions[bitarray_to_int(substate)]
-
-            # Determine if we have reached cyclic stability.
-            state_string = newstate.to01().strip('0')
-            if prev_state_string == state_string:
-                cyclic_generation = generation
-                cyclic_diff = Pots._evaluate_state(newstate, zero_pot_idx) - Pots._evaluate_state(state, zero_pot_idx)
-                break
-
-            # Otherwise, continue with the next state.
-            state = newstate
-
-        # If we found a cycle, very generation after cyclic_generation adds a fixed amount by shifting the pots to the
-        # right.
-        prefix = 0
-        if cyclic_diff != 0:
-            prefix = cyclic_diff * (generations - cyclic_generation)
+
+        # The states are stored with their trailing empty pots dropped, so a state that repeats up to a shift maps to
+        # the same int. Record the generation at which each state was first seen, along with the states and zero pot
+        # indices by generation.
+        seen = {state: 0}
+        history = [(state, zero_pot_idx)]
+
+        for generation in range(1, generations + 1):
+            state = self._next_generation(state)
+
+            # The zero pot has migrated left by two, and we drop the trailing empty pots.
+            trailing_zeros = (state & -state).bit_length() - 1 if state else 0
+            state >>= trailing_zeros
+            zero_pot_idx += 2 - trailing_zeros
+
+            # If we have seen this state before, we have found a cycle, in which the pots shift by a fixed amount
+            # every period, so we can jump straight to the final generation.
+            if state in seen:
+                cycle_start = seen[state]
+                period = generation - cycle_start
+                drift = zero_pot_idx - history[cycle_start][1]
+                cycles, offset = divmod(generations - cycle_start, period)
+                final_state, final_zero_pot_idx = history[cycle_start + offset]
+                return Pots._evaluate_state(final_state, final_zero_pot_idx + cycles * drift)
+
+            seen[state] = generation
+            history.append((state, zero_pot_idx))
 
         # Now sum the pots containing plants.
-        return prefix + sum([i - zero_pot_idx for i, j in enumerate(state) if j])
+        return Pots._evaluate_state(state, zero_pot_idx)
 
 
 if __name__ == '__main__':
     day = 12
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
 
     # 2917
     a1 = Pots(data).run_simulation()
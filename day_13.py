@@ -3,153 +3,162 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
-from enum import Enum
-
-
-class Direction(Enum):
-    NORTH = 1
-    EAST = 2
-    SOUTH = 3
-    WEST = 4
-
-
-class Track(Enum):
-    NORTH_SOUTH = 1
-    EAST_WEST = 2
-    SLASH = 3  # /
-    BACKSLASH = 4  # \
-    INTERSECTION = 5
-    EMPTY = 6
-
-
-class Cart:
-    id = 0
-
-    def __init__(self, xpos: int, ypos: int, dir: Direction):
-        self.id = Cart.id
-        Cart.id += 1
-        self.x = xpos
-        self.y = ypos
-        self._dir = dir
-        self._intersection_state = 0
-        self.collision_state = False
-
-    def tick(self, rails, carts, remove_crashes=False):
+import numpy as np
+from numba import njit
+
+
+# The directions a cart can head in, in clockwise order so that turning is addition mod 4.
+NORTH = 0
+EAST = 1
+SOUTH = 2
+WEST = 3
+
+# The types of track, as stored in the uint8 rails array.
+EMPTY = 0
+NORTH_SOUTH = 1
+EAST_WEST = 2
+SLASH = 3  # /
+BACKSLASH = 4  # \
+INTERSECTION = 5
+
+
+def _build_moves(width):
+    """
+    Build the lookup table of cart moves, where moves[track, dir, state] = (step, new_dir, new_state) is the step
+    taken in flattened positions on rails of the given width, the new direction, and the new intersection state of a
+    cart heading in direction dir with intersection state state when it is on the given type of track. Illegal
+    combinations have a new_dir of -1.
+    At an intersection, the cart turns left, goes straight, or turns right for a state of 0, 1, or 2 respectively, and
+    the state advances; elsewhere the state is unchanged.
+    """
+    deltas = {NORTH: -width, EAST: 1, SOUTH: width, WEST: -1}
+    turns = {
+        NORTH_SOUTH: {NORTH: NORTH, SOUTH: SOUTH},
+        EAST_WEST: {EAST: EAST, WEST: WEST},
+        SLASH: {NORTH: EAST, EAST: NORTH, SOUTH: WEST, WEST: SOUTH},
+        BACKSLASH: {NORTH: WEST, EAST: SOUTH, SOUTH: EAST, WEST: NORTH}
+    }
+
+    moves = np.zeros((6, 4, 3, 3), dtype=np.int32)
+    moves[:, :, :, 1] = -1
+    for state in range(3):
+        for track, track_turns in turns.items():
+            for dir, new_dir in track_turns.items():
+                moves[track, dir, state] = deltas[new_dir], new_dir, state
+        for dir in deltas:
+            new_dir = (dir + state + 3) % 4
+            moves[INTERSECTION, dir, state] = deltas[new_dir], new_dir, (state + 1) % 3
+    return moves
+
+
+@njit(cache=True)
+def _tick(rails, moves, pos, dirs, states, alive, occupied, order, remove_crashes):
+    """
+    The compiled tick of all the carts, as described in Rails.tick.
+    Positions are flattened, so that (x, y) is x * width + y for the width of the rails, and rails and occupied are the
+    flattened grids. Cart i is at pos[i] heading in direction dirs[i], and states[i] counts its turns at intersections:
+    0 turns left, 1 goes straight, and 2 turns right. occupied[p] is the i + 1 of the cart at position p, or 0.
+    order holds the indices of the carts in their order from the last tick.
+    :return: the index of the first cart to collide if not removing crashes, and -1 otherwise
+    """
+    # Carts only move one step per tick, so the order from the last tick is nearly sorted, and an insertion sort in
+    # place restores it in close to linear time. The flattened positions are already in the order of (x, y).
+    for k in range(1, len(order)):
+        i = order[k]
+        key = pos[i]
+        j = k - 1
+        while j >= 0 and pos[order[j]] > key:
+            order[j + 1] = order[j]
+            j -= 1
+        order[j + 1] = i
+
+    for i in order:
         # If the cart has already collided, there is nothing to do.
-        if self.collision_state:
-            return None
-
-        oldx, oldy = self.x, self.y
-
-        if rails[(self.x, self.y)] == Track.NORTH_SOUTH:
-            if self._dir == Direction.NORTH:
-                self.x -= 1
-            elif self._dir == Direction.SOUTH:
-                self.x += 1
-            else:
-                raise ValueError("Cart {} heading in illegal direction when encountered north-south".format(self.id))
-        elif rails[(self.x, self.y)] == Track.EAST_WEST:
-            if self._dir == Direction.EAST:
-                self.y += 1
-            elif self._dir == Direction.WEST:
-                self.y -= 1
-            else:
-                raise ValueError("Cart {} heading in illegal direction when encountered east-west".format(self.id))
-        elif rails[(self.x, self.y)] == Track.SLASH:
-            if self._dir == Direction.NORTH:
-                self.y += 1
-                self._dir = Direction.EAST
-            elif self._dir == Direction.EAST:
-                self.x -= 1
-                self._dir = Direction.NORTH
-            elif self._dir == Direction.SOUTH:
-                self.y -= 1
-                self._dir = Direction.WEST
-            elif self._dir == Direction.WEST:
-                self.x += 1
-                self._dir = Direction.SOUTH
-        elif rails[(self.x, self.y)] == Track.BACKSLASH:
-            if self._dir == Direction.NORTH:
-                self.y -= 1
-                self._dir = Direction.WEST
-            elif self._dir == Direction.EAST:
-                self.x += 1
-                self._dir = Direction.SOUTH
-            elif self._dir == Direction.SOUTH:
-                self.y += 1
-                self._dir = Direction.EAST
-            elif self._dir == Direction.WEST:
-                self.x -= 1
-                self._dir = Direction.NORTH
-        elif rails[(self.x, self.y)] == Track.INTERSECTION:
-            if self._intersection_state == 0:
-                if self._dir == Direction.NORTH:
-                    self.y -= 1
-                    self._dir = Direction.WEST
-                elif self._dir == Direction.EAST:
-                    self.x -= 1
-                    self._dir = Direction.NORTH
-                elif self._dir == Direction.SOUTH:
-                    self.y += 1
-                    self._dir = Direction.EAST
-                elif self._dir == Direction.WEST:
-                    self.x += 1
-                    self._dir = Direction.SOUTH
-            elif self._intersection_state == 1:
-                if self._dir == Direction.NORTH:
-                    self.x -= 1
-                elif self._dir == Direction.EAST:
-                    self.y += 1
-                elif self._dir == Direction.SOUTH:
-                    self.x += 1
-                elif self._dir == Direction.WEST:
-                    self.y -= 1
-            elif self._intersection_state == 2:
-                if self._dir == Direction.NORTH:
-                    self.y += 1
-                    self._dir = Direction.EAST
-                elif self._dir == Direction.EAST:
-                    self.x += 1
-                    self._dir = Direction.SOUTH
-                elif self._dir == Direction.SOUTH:
-                    self.y -= 1
-                    self._dir = Direction.WEST
-                elif self._dir == Direction.WEST:
-                    self.x -= 1
-                    self._dir = Direction.NORTH
-            self._intersection_state = (self._intersection_state + 1) % 3
-
-        # Update carts and check for collision.
-        del carts[(oldx, oldy)]
-        if (self.x, self.y) in carts:
-            self.collision_state = True
-            carts[(self.x, self.y)].collistion_state = True
-
-            if remove_crashes:
-                del carts[(self.x, self.y)]
-
-            # The output expects (y, x)
-            return self.y, self.x
+        if not alive[i]:
+            continue
+
+        p = pos[i]
+        occupied[p] = 0
+
+        step, d, s = moves[rails[p], dirs[i], states[i]]
+        if d < 0:
+            raise ValueError('Cart heading in illegal direction for its track')
+
+        p += step
+        pos[i], dirs[i], states[i] = p, d, s
+
+        # Check for collision.
+        if occupied[p]:
+            alive[i] = False
+            alive[occupied[p] - 1] = False
+            occupied[p] = 0
+            if not remove_crashes:
+                return i
         else:
-            carts[(self.x, self.y)] = self
-            return None
+            occupied[p] = i + 1
+    return -1
+
+
+@njit(cache=True)
+def _run(rails, moves, pos, dirs, states, alive, occupied, order, remove_crashes):
+    """
+    The compiled simulation, which ticks the carts as in _tick until the first collision if not removing crashes, and
+    otherwise until at most one cart is left.
+    :return: the index of the first cart to collide if not removing crashes, and otherwise the index of the last cart
+             standing, or -1 if there is none
+    """
+    if not remove_crashes:
+        i = -1
+        while i < 0:
+            i = _tick(rails, moves, pos, dirs, states, alive, occupied, order, False)
+        return i
+
+    while np.count_nonzero(alive) > 1:
+        _tick(rails, moves, pos, dirs, states, alive, occupied, order, True)
+    for i in range(len(alive)):
+        if alive[i]:
+            return i
+    return -1
 
 
 class Rails:
-    def __init__(self, rails, carts):
-        self._rails = rails
-        self._carts = carts
+    def __init__(self, rails, xs, ys, dirs):
+        # Positions are flattened to x * width + y, so the rails are kept as a flat array, with the moves between
+        # flattened positions for their width.
+        self._width = rails.shape[1]
+        self._rails = rails.ravel()
+        self._moves = _build_moves(self._width)
+
+        # Store the carts as parallel arrays, along with an occupancy grid holding the index + 1 of the cart at each
+        # position.
+        self._pos = np.array(xs, dtype=np.int32) * self._width + np.array(ys, dtype=np.int32)
+        self._dirs = np.array(dirs, dtype=np.int32)
+        self._states = np.zeros(len(xs), dtype=np.int32)
+        self._alive = np.ones(len(xs), dtype=np.bool_)
+        self._occupied = np.zeros(rails.size, dtype=np.int32)
+        self._occupied[self._pos] = np.arange(1, len(xs) + 1)
+        self._order = np.arange(len(xs), dtype=np.int32)
+
+    def _position(self, i):
+        """
+        The output expects (y, x), so unflatten the position of cart i into that.
+        """
+        x, y = divmod(int(self._pos[i]), self._width)
+        return y, x
 
     def tick(self, remove_crashes=False):
-        # Sort the carts by their x, y coordinates:
-        cart_order = sorted(self._carts.keys())
-        for x, y in cart_order:
-            if (x, y) in self._carts:
-                result = self._carts[(x, y)].tick(self._rails, self._carts, remove_crashes)
-                if result is not None and not remove_crashes:
-                    return result
-        return None
+        """
+        Move all the carts one step along the rails, in order of their x, y coordinates.
+        :param remove_crashes: if False, stop at the first collision
+        :return: the (y, x) position of the first collision if not removing crashes, or None otherwise
+        """
+        i = _tick(self._rails, self._moves, self._pos, self._dirs, self._states, self._alive, self._occupied,
+                  self._order, remove_crashes)
+        if i < 0:
+            return None
+        return self._position(i)
 
     def run_simulation(self):
         """
@@ -161,10 +170,9 @@ class Rails:
         >>> r.run_simulation()
         (7, 3)
         """
-        result = None
-        while result is None:
-            result = self.tick()
-        return result
+        i = _run(self._rails, self._moves, self._pos, self._dirs, self._states, self._alive, self._occupied,
+                 self._order, False)
+        return self._position(i)
 
     def run_cart_removal_simulation(self):
         """
@@ -176,55 +184,50 @@ class Rails:
         >>> r.run_cart_removal_simulation()
         (6, 4)
         """
-        while len(self._carts) > 1:
-            self.tick(True)
-        assert(len(self._carts) == 1)
-        for cart in self._carts.values():
-            return cart.y, cart.x
+        i = _run(self._rails, self._moves, self._pos, self._dirs, self._states, self._alive, self._occupied,
+                 self._order, True)
+        assert(i >= 0)
+        return self._position(i)
 
 
 def process_rails(data):
-    rails = {}
-    carts = {}
+    lines = data.split('\n')
+    rails = np.zeros((len(lines), max(len(line) for line in lines)), dtype=np.uint8)
 
-    # Process the rails first.
-    for x, line in enumerate(data.split('\n')):
+    # Process the rails and the carts in a single pass.
+    xs, ys, dirs = [], [], []
+    directions = {'^': NORTH, '>': EAST, 'v': SOUTH, '<': WEST}
+    for x, line in enumerate(lines):
         for y, symbol in enumerate(line):
             # Process rails
             if symbol == ' ':
-                rails[(x, y)] = Track.EMPTY
+                rails[x, y] = EMPTY
             elif symbol == '|' or symbol == '^' or symbol == 'v':
-                rails[(x, y)] = Track.NORTH_SOUTH
+                rails[x, y] = NORTH_SOUTH
             elif symbol == '-' or symbol == '>' or symbol == '<':
-                rails[(x, y)] = Track.EAST_WEST
+                rails[x, y] = EAST_WEST
             elif symbol == '/':
-                rails[(x, y)] = Track.SLASH
+                rails[x, y] = SLASH
             elif symbol == '\\':
-                rails[(x, y)] = Track.BACKSLASH
+                rails[x, y] = BACKSLASH
             elif symbol == '+':
-                rails[(x, y)] = Track.INTERSECTION
+                rails[x, y] = INTERSECTION
             else:
                 raise ValueError('Illegal input symbol at ({},{}): {}'.format(x, y, symbol))
 
-    # Process the carts.
-    for x, line in enumerate(data.split('\n')):
-        for y, symbol in enumerate(line):
-            if symbol == '^':
-                carts[(x, y)] = Cart(x, y, Direction.NORTH)
-            elif symbol == '>':
-                carts[(x, y)] = Cart(x, y, Direction.EAST)
-            elif symbol == 'v':
-                carts[(x, y)] = Cart(x, y, Direction.SOUTH)
-            elif symbol == '<':
-                carts[(x, y)] = Cart(x, y, Direction.WEST)
+            # Process carts
+            if symbol in directions:
+                xs.append(x)
+                ys.append(y)
+                dirs.append(directions[symbol])
 
-    return Rails(rails, carts)
+    return Rails(rails, xs, ys, dirs)
 
 
 if __name__ == '__main__':
     day = 13
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
 
     r1 = process_rails(data)
     a1 = r1.run_simulation()
@@ -3,7 +3,10 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
+import numpy as np
+from numba import njit
 
 
 def find_recipes(rounds):
@@ -19,16 +22,89 @@ def find_recipes(rounds):
     >>> find_recipes(2018)
     [5, 9, 4, 1, 4, 2, 9, 8, 8, 2]
     """
-    recipes = [3, 7]
+    # The recipes are stored one per byte, and we never need more than rounds + 11 of them.
+    recipes = bytearray(rounds + 11)
+    recipes[0], recipes[1] = 3, 7
+    n = 2
     elf1 = 0
     elf2 = 1
-    while len(recipes) < rounds + 10:
+    while n < rounds + 10:
+        # The new recipe is at most 18, so it is either a single digit, or a one followed by a digit.
         new_recipe = recipes[elf1] + recipes[elf2]
-        for i in str(new_recipe):
-            recipes.append(int(i))
-        elf1 = (elf1 + recipes[elf1] + 1) % len(recipes)
-        elf2 = (elf2 + recipes[elf2] + 1) % len(recipes)
-    return recipes[rounds:rounds+10]
+        if new_recipe >= 10:
+            recipes[n] = 1
+            recipes[n + 1] = new_recipe - 10
+            n += 2
+        else:
+            recipes[n] = new_recipe
+            n += 1
+
+        # An elf moves at most ten places, so this wraps by subtraction rather than modulo.
+        elf1 += recipes[elf1] + 1
+        while elf1 >= n:
+            elf1 -= n
+        elf2 += recipes[elf2] + 1
+        while elf2 >= n:
+            elf2 -= n
+    return list(recipes[rounds:rounds+10])
+
+
+@njit(cache=True)
+def _ends_with(recipes, n, digits):
+    """
+    Determine if the first n recipes end with the digits, comparing from the last digit, where most mismatches are.
+    """
+    pattern_len = len(digits)
+    if n < pattern_len:
+        return False
+    for k in range(pattern_len - 1, -1, -1):
+        if recipes[n - pattern_len + k] != digits[k]:
+            return False
+    return True
+
+
+@njit(cache=True)
+def _advance(recipes, n, elf):
+    """
+    Move an elf forward one plus the score of its recipe, wrapping around the first n recipes.
+    An elf moves at most ten places, so this wraps by subtraction rather than modulo.
+    """
+    elf += recipes[elf] + 1
+    while elf >= n:
+        elf -= n
+    return elf
+
+
+@njit(cache=True)
+def _search(recipes, n, elf1, elf2, tail, digits, modulus, target):
+    """
+    The compiled search for the digits, as described in find_recipes_2, from the state where the first n entries of the
+    recipes buffer are in use, the elves are at elf1 and elf2, and tail holds the last recipes as an integer modulo
+    modulus. The search stops when the digits are found, or when there is no room in the buffer for another round.
+    :return: the number of recipes to the left of the digits, or -1 if they were not found, and the state to resume from
+    """
+    pattern_len = len(digits)
+    while n + 2 <= len(recipes):
+        # We have to check after each recipe we add, as the pattern could appear in the middle of adding new recipes.
+        # In fact, in my case, it does. The sum is made int64, as the sum of two uint8s is uint64, which would make the
+        # arithmetic on the tail floating point and lose digits of it.
+        new_recipe = np.int64(recipes[elf1]) + np.int64(recipes[elf2])
+        if new_recipe >= 10:
+            recipes[n] = 1
+            n += 1
+            tail = (tail * 10 + 1) % modulus
+            if tail == target and _ends_with(recipes, n, digits):
+                return n - pattern_len, n, elf1, elf2, tail
+            new_recipe -= 10
+        recipes[n] = new_recipe
+        n += 1
+        tail = (tail * 10 + new_recipe) % modulus
+        if tail == target and _ends_with(recipes, n, digits):
+            return n - pattern_len, n, elf1, elf2, tail
+
+        elf1 = _advance(recipes, n, elf1)
+        elf2 = _advance(recipes, n, elf2)
+    return -1, n, elf1, elf2, tail
 
 
 def find_recipes_2(pattern):
@@ -45,37 +121,42 @@ def find_recipes_2(pattern):
     18
     >>> find_recipes_2('59414')
     2018
+    >>> find_recipes_2('37')
+    0
+    >>> find_recipes_2('7')
+    1
+    >>> find_recipes_2('6739165111612421')
+    4826
     """
-    # Make rounds into a list of digits.
-    pattern_len = len(pattern)
-    digits = [int(i) for i in pattern]
-    last_digits = []
-    recipes = [3, 7]
-    elf1 = 0
-    elf2 = 1
-    looking = True
-    while looking:
-        new_recipe = recipes[elf1] + recipes[elf2]
-        for i in str(new_recipe):
-            if len(last_digits) == pattern_len:
-                last_digits.pop(0)
-            recipes.append(int(i))
-            last_digits.append(int(i))
-
-            # We have to check here as it could appear in the middle of adding new recipes.
-            # In fact, in my case, it does.
-            if last_digits == digits:
-                looking = False
-                break
-        elf1 = (elf1 + recipes[elf1] + 1) % len(recipes)
-        elf2 = (elf2 + recipes[elf2] + 1) % len(recipes)
-    return len(recipes) - len(digits)
+    # The search only checks the pattern as each new recipe is added, so first check the starting scoreboard.
+    if pattern in '37':
+        return '37'.index(pattern)
+
+    # Make the pattern into an array of digits.
+    digits = np.array([int(i) for i in pattern], dtype=np.uint8)
+
+    # Keep the last (up to 17) recipes as an integer, so that each new recipe costs one comparison against the same
+    # digits of the pattern, and only a match has to be confirmed against the whole pattern.
+    width = min(len(pattern), 17)
+    modulus = np.int64(10 ** width)
+    target = np.int64(pattern[-width:])
+
+    # The recipes are stored one per byte in a buffer that doubles in size whenever the search runs out of room, of
+    # which the first n are used.
+    recipes = np.zeros(1 << 20, dtype=np.uint8)
+    recipes[0], recipes[1] = 3, 7
+    n, elf1, elf2, tail = 2, 0, 1, np.int64(37) % modulus
+    while True:
+        found, n, elf1, elf2, tail = _search(recipes, n, elf1, elf2, tail, digits, modulus, target)
+        if found >= 0:
+            return int(found)
+        recipes = np.concatenate((recipes, np.zeros_like(recipes)))
 
 
 if __name__ == '__main__':
     day = 14
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
     rounds = int(data)
 
     a1 = ''.join([str(i) for i in find_recipes(rounds)])
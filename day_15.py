@@ -3,96 +3,259 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
-from enum import Enum
-from copy import deepcopy
+from enum import IntEnum
+from functools import lru_cache, partial
+from multiprocessing import Pool
+import numpy as np
+from numba import njit
+import os
 import sys
 
 
-class Terrain(Enum):
-    WALL = 1
-    FLOOR = 2
+# The terrain and race values are what is stored in the int8 grid of the board used by the compiled search. They are
+# IntEnums so that the comparisons of races in the game loop are plain integer comparisons.
+class Terrain(IntEnum):
+    WALL = -1
+    FLOOR = 0
 
 
-class Race(Enum):
+class Race(IntEnum):
     ELF = 1
     GOBLIN = 2
 
 
-def list_or_none(L):
+@njit(cache=True)
+def _find_step(cells, x, y, enemy, first, queue, visited, generation):
     """
-    If a list is a singleton, return the element, and otherwise None.
+    The compiled search for the move of a critter, as described in _round.
+    Run a BFS from (x, y) over the floor cells, visiting neighbours in reading order, until we find the reading order
+    first tile adjacent to an enemy at the shortest distance, recording for each tile the first step taken to reach it.
+    The search works on the flattened board, where the neighbours of cell x * cols + y are at offsets -cols, -1, 1, and
+    cols; the last column of the board is a wall, so the rows never run into each other.
+    The scratch arrays are shared between searches: rather than being cleared, a tile counts as visited in this search
+    only if its entry in visited is the generation of the search.
+    :param cells: the board, where cells[x, y] is a Terrain value or the Race value of the critter there
+    :param x: the x coordinate of the critter
+    :param y: the y coordinate of the critter
+    :param enemy: the Race value of the enemies of the critter
+    :param first: the scratch array of the first step taken to reach each tile, with one entry per cell of the board
+    :param queue: the scratch array of the BFS queue, with one entry per cell of the board
+    :param visited: the array of the generation of the last search to visit each tile, with one entry per cell
+    :param generation: the generation of this search, which must differ from that of every earlier search
+    :return: the position of the first step to take, or (-1, -1) if no enemy can be reached
     """
-    return None if len(L) == 0 else L[0]
+    rows, cols = cells.shape
+    size = rows * cols
+    flat = cells.ravel()
+    offsets = (-cols, -1, 1, cols)
+
+    # The queue holds the frontier of each distance in turn, with the current one ending at level_end.
+    start = x * cols + y
+    first[start] = start
+    visited[start] = generation
+    queue[0] = start
+    head, tail, level_end = 0, 1, 1
+    best = -1
+
+    while head < tail:
+        # Once a frontier is exhausted, if it had a tile in range, it holds all the tiles at the shortest distance.
+        if head == level_end:
+            if best >= 0:
+                break
+            level_end = tail
 
+        cell = queue[head]
+        head += 1
 
-class Critter:
-    id = 0
+        for k in range(4):
+            neighbour = cell + offsets[k]
+            if neighbour < 0 or neighbour >= size:
+                continue
+            content = flat[neighbour]
 
-    def __init__(self, race, x, y):
-        self.attack_power = 3
-        self.hit_points = 200
-        self.race = race
-        self.x = x
-        self.y = y
-        self.id = Critter.id
-        Critter.id += 1
+            # If there is an enemy adjacent to the tile, it is in range.
+            if content == enemy and cell != start and (best < 0 or cell < best):
+                best = cell
 
-    # def __str__(self):
-    #     return '{}(id={}, x={}, y={}, attack={}, hp={})'.format('G' if self.race == Race.GOBLIN else 'E', self.id,
-    #                                                  self.x, self.y, self.attack_power, self.hit_points)
+            # Each tile is reached first from the tile that was itself reached with the first step in reading order,
+            # since the frontiers are kept in that order. Once a tile in range has been found, the rest of this frontier
+            # only has to be checked for tiles in range, as the next frontier will never be searched.
+            if best < 0 and content == Terrain.FLOOR.value and visited[neighbour] != generation:
+                visited[neighbour] = generation
+                first[neighbour] = neighbour if cell == start else first[cell]
+                queue[tail] = neighbour
+                tail += 1
 
-    def __str__(self):
-        return '{}({})'.format('G' if self.race == Race.GOBLIN else 'E', self.hit_points)
+    if best < 0:
+        return -1, -1
+    return first[best] // cols, first[best] % cols
 
 
-class Game:
-    delta = [(0, -1), (-1, 0), (1, 0), (0, 1)]
+@njit(cache=True)
+def _weakest_adjacent_enemy(occupied, races, hit_points, cols, position, enemy):
+    """
+    Find the enemy adjacent to a position on the flattened board with the fewest hit points, breaking ties by reading
+    order. This is a single pass over the neighbours in reading order.
+    :param occupied: the flattened board, where occupied[p] is the i + 1 of the critter at position p, or 0
+    :param races: the Race values of the critters
+    :param hit_points: the hit points of the critters
+    :param cols: the number of columns of the board
+    :param position: the flattened position
+    :param enemy: the Race value of the enemies
+    :return: the index of the enemy, or -1 if there is no such enemy
+    """
+    weakest = -1
+    for offset in (-cols, -1, 1, cols):
+        neighbour = position + offset
+        if neighbour < 0 or neighbour >= len(occupied) or occupied[neighbour] == 0:
+            continue
+        j = occupied[neighbour] - 1
+        if races[j] == enemy and (weakest < 0 or hit_points[j] < hit_points[weakest]):
+            weakest = j
+    return weakest
+
+
+@njit(cache=True)
+def _round(cells, occupied, races, xs, ys, hit_points, attack_powers, num_alive, order, stuck, first, queue, visited,
+           generation, stop_on_elf_death):
+    """
+    The compiled round of the game, in which each living critter in reading order attacks the weakest adjacent enemy,
+    or otherwise moves one step towards the nearest enemy and then attacks if it can.
+    Critter i is of race races[i] at (xs[i], ys[i]), with hit_points[i] and attack_powers[i], and is dead once its hit
+    points drop to zero. occupied is the flattened board, where occupied[p] is the i + 1 of the critter at position p,
+    or 0, and num_alive[race] is the number of living critters of each race. order holds the indices of the critters
+    in their reading order from the last round. stuck[i] is True if the last search of critter i found no enemy in
+    reach, and no critter has moved or died since, so that searching again would give the same result. first, queue,
+    visited, and generation are the shared state of _find_step, where generation is that of the last search. If
+    stop_on_elf_death, the round ends as soon as an elf dies.
+    :return: whether all the critters acted, and the generation of the last search
+    """
+    cols = cells.shape[1]
+    elf, goblin = Race.ELF.value, Race.GOBLIN.value
+
+    # The critters act in reading order, i.e. in order of their flattened positions. Critters move at most one step per
+    # round, so the order from the last round is nearly sorted, and an insertion sort in place restores it in close to
+    # linear time.
+    for k in range(1, len(order)):
+        i = order[k]
+        key = xs[i] * cols + ys[i]
+        j = k - 1
+        while j >= 0 and xs[order[j]] * cols + ys[order[j]] > key:
+            order[j + 1] = order[j]
+            j -= 1
+        order[j + 1] = i
+
+    for i in order:
+        # If the critter was killed, we skip.
+        if hit_points[i] <= 0:
+            continue
+
+        # We stop combat when some unit cannot act.
+        enemy = goblin if races[i] == elf else elf
+        if num_alive[enemy] == 0:
+            return False, generation
+
+        # We have two cases to consider:
+        # 1. If any enemies are adjacent to us, pick the the weakest one.
+        # 2. Otherwise, pick the enemy closest to us and move towards them, breaking ties with reading order.
+        # If there are immediately adjacent enemies, simply attack the weakest.
+
+        # Case 1:
+        target = _weakest_adjacent_enemy(occupied, races, hit_points, cols, xs[i] * cols + ys[i], enemy)
+
+        # Case 2:
+        if target < 0 and not stuck[i]:
+            # Find the first step on the shortest path to the nearest tile in range of an enemy, breaking ties with the
+            # reading order of the tile and then of the step.
+            generation += 1
+            x, y = _find_step(cells, xs[i], ys[i], enemy, first, queue, visited, generation)
+            if x < 0:
+                stuck[i] = True
+            else:
+                # Move, which may open up a path for any of the critters that are stuck.
+                stuck[:] = False
+                occupied[xs[i] * cols + ys[i]] = 0
+                cells[xs[i], ys[i]] = Terrain.FLOOR.value
+                occupied[x * cols + y] = i + 1
+                cells[x, y] = races[i]
+                xs[i], ys[i] = x, y
+
+                # If we are now adjacent to an enemy, attack the weakest one.
+                target = _weakest_adjacent_enemy(occupied, races, hit_points, cols, x * cols + y, enemy)
+
+        if target >= 0:
+            hit_points[target] -= attack_powers[i]
+            if hit_points[target] <= 0:
+                stuck[:] = False
+                occupied[xs[target] * cols + ys[target]] = 0
+                cells[xs[target], ys[target]] = Terrain.FLOOR.value
+                num_alive[enemy] -= 1
+                if stop_on_elf_death and enemy == elf:
+                    return False, generation
+    return True, generation
+
+
+@lru_cache(maxsize=32)
+def _parse_board(data):
+    """
+    Parse the game setup from the provided data. The result depends only on the data, so it is cached, and the board
+    is made read-only so that it can be shared by every Game made from the same data.
+    :param data: the block of text passed in as input
+    :return: the board, where each cell is a Terrain value, and a tuple of the race and position of each critter, in
+             reading order
+    """
+    # Read the data as a grid of bytes, padding the lines with wall to the same length. The newlines at the ends of the
+    # lines form an extra column of wall on the right of the board, which the compiled search relies on.
+    lines = data.rstrip('\n').split('\n')
+    cols = max(len(line) for line in lines)
+    text = ''.join(line.ljust(cols, '#') + '\n' for line in lines)
+    grid = np.frombuffer(text.encode(), dtype=np.uint8).reshape(len(lines), cols + 1)
+
+    # Process the terrain.
+    board = np.where(np.isin(grid, np.frombuffer(b'.EG', dtype=np.uint8)),
+                     Terrain.FLOOR.value, Terrain.WALL.value).astype(np.int8)
+    board.setflags(write=False)
 
+    # Record the race and position of the critters, in reading order, from which each game creates its own.
+    snapshot = tuple((Race.ELF if grid[row, col] == ord('E') else Race.GOBLIN, row, col)
+                     for row, col in np.argwhere((grid == ord('E')) | (grid == ord('G'))).tolist())
+    return board, snapshot
+
+
+class Game:
     def __init__(self, data):
         """
         Read the dame setup from the provided data, and we create the immutable data that will be used to play.
         :param data: the block of text passed in as input
         """
-        # Maintain a dictionary of (x,y) to critter to simplify sorting reading order.
-        self._critters = {}
-        self._board = []
-
-        for row, line in enumerate(data.split('\n')):
-            new_row = []
-            for col, entry in enumerate(list(line)):
-                # Process the terrain.
-                if entry == '.' or entry == 'E' or entry == 'G':
-                    new_row.append(Terrain.FLOOR)
-                else:
-                    new_row.append(Terrain.WALL)
-
-                # If there is a critter here, add it to the list.
-                if entry == 'E':
-                    self._critters[(row, col)] = Critter(Race.ELF, row, col)
-                elif entry == 'G':
-                    self._critters[(row, col)] = Critter(Race.GOBLIN, row, col)
-            self._board.append(new_row)
+        self._board, self._snapshot = _parse_board(data)
 
-    def print_board(self, critters):
-        # Print the playing board and the critters.
+    def print_board(self, races, xs, ys, hit_points):
+        # Print the playing board and the living critters.
+        living = {(int(xs[i]), int(ys[i])): i for i in range(len(races)) if hit_points[i] > 0}
         for row in range(len(self._board)):
             baddies = []
-            for col in range(len(self._board[row])):
-                if (row, col) in critters:
-                    sys.stdout.write('E' if critters[(row, col)].race == Race.ELF else 'G')
+            for col in range(self._board.shape[1] - 1):
+                if (row, col) in living:
+                    i = living[(row, col)]
+                    sys.stdout.write('E' if races[i] == Race.ELF else 'G')
+                    baddies.append('{}({})'.format('E' if races[i] == Race.ELF else 'G', hit_points[i]))
                 else:
-                    sys.stdout.write('#' if self._board[row][col] == Terrain.WALL else '.')
-                    baddies = sorted([c for c in critters.values() if c.x == row], key=lambda c: c.y)
-            sys.stdout.write('  ' + ', '.join([str(c) for c in baddies]))
+                    sys.stdout.write('#' if self._board[row, col] == Terrain.WALL.value else '.')
+            sys.stdout.write('  ' + ', '.join(baddies))
             sys.stdout.write('\n')
         sys.stdout.write('\n')
 
-    def play(self, critters=None, debug=False):
+    def play(self, elf_attack_power=3, debug=False, stop_on_elf_death=False):
         """
-        Simulate the game, making a copy of the objects so at the leave the base confirguration immutable.
-        :return: the sum of the hit points of the survivors multiplied by the number of rounds, and the number
-                 of elves that survived, if any
+        Simulate the game, creating fresh critters so as to leave the base configuration immutable.
+        :param elf_attack_power: the attack power of the elves
+        :param stop_on_elf_death: if True, stop the game as soon as an elf dies, for when only a game that all the elves
+                                  survive is of interest
+        :return: the sum of the hit points of the survivors multiplied by the number of rounds, or None if the game was
+                 stopped by the death of an elf, and the number of elves that survived, if any
 
         >>> Game(open('day_15_1.dat').read()).play()[0]
         27828
@@ -113,157 +276,43 @@ class Game:
         >>> Game(open('day_15_9.dat').read()).play()[0]
         10234
         """
-        # Make copies of the data that should be mutable so that we can manipulate it.
-        # This comprises the critter dictionary.
-        critters = deepcopy(self._critters) if critters is None else deepcopy(critters)
-
-        def can_be_occupied(tile):
-            """
-            Determine if position (x, y) can be occupied, (x, y) is in bounds and a floor tile.
-            """
-            x, y = tile
-            return 0 <= x <= len(self._board) and \
-                   0 <= y <= len(self._board[0]) and \
-                   self._board[x][y] == Terrain.FLOOR and \
-                   (x, y) not in critters
+        # Create the critters as parallel arrays, which are the data that should be mutable so that we can manipulate
+        # them, along with the board with the critters on it and the occupancy grid holding the index + 1 of the
+        # critter at each flattened position.
+        races = np.array([race.value for race, _, _ in self._snapshot], dtype=np.int8)
+        xs = np.array([x for _, x, _ in self._snapshot], dtype=np.int32)
+        ys = np.array([y for _, _, y in self._snapshot], dtype=np.int32)
+        hit_points = np.full(len(races), 200, dtype=np.int32)
+        attack_powers = np.where(races == Race.ELF.value, elf_attack_power, 3).astype(np.int32)
+
+        cells = self._board.copy()
+        cells[xs, ys] = races
+        cols = cells.shape[1]
+        occupied = np.zeros(cells.size, dtype=np.int32)
+        occupied[xs * cols + ys] = np.arange(1, len(races) + 1)
+
+        # Keep count of the living critters of each race, so we know when one side has been wiped out, and keep the
+        # order of the critters from round to round, starting from the reading order of the snapshot.
+        num_alive = np.bincount(races, minlength=len(Race) + 1).astype(np.int32)
+        order = np.arange(len(races), dtype=np.int32)
+        stuck = np.zeros(len(races), dtype=np.bool_)
+
+        # The scratch arrays of the compiled search, allocated once for the whole game.
+        first = np.empty(cells.size, dtype=np.int32)
+        queue = np.empty(cells.size, dtype=np.int32)
+        visited = np.zeros(cells.size, dtype=np.uint32)
+        generation = 0
 
         if debug:
             print("Initial:")
-            self.print_board(critters)
-
-        def adjacent_enemies(tile, race):
-            """
-            Return the positions of enemies to the specified race that are adjacent to tile (x,y).
-            """
-            adj = []
-            for dx, dy in Game.delta:
-                newx, newy = tile[0] + dx, tile[1] + dy
-                if (newx, newy) in critters and critters[(newx, newy)].race != race:
-                    adj.append((newx, newy))
-            return adj
+            self.print_board(races, xs, ys, hit_points)
 
         # Now play the game until all of the critters on one side are dead.
         num_rounds = 0
         while True:
-            # We sort the critters to indicate the reading order, i.e. the order in which they act.
-            # We sort on the critters keys, i.e. (x, y), but store by ID so we can skip over dead critters.
-            critter_order = [critters[(x, y)].id for x, y in sorted(critters)]
-
-            # Now, for each non-dead critter, we must find the shortest path to its nearest enemy, if one exists.
-            all_units_acted = True
-            for critter_id in critter_order:
-                # If the critter was killed, we skip.
-                critter = list_or_none([c for c in critters.values() if c.id == critter_id])
-                if critter is None:
-                    continue
-
-                # We stop combat when some unit cannot act.
-                if len([c for c in critters.values() if c.race != critter.race]) == 0:
-                    all_units_acted = False
-                    break
-
-                # Clear out the enemy to attack:
-                enemy_to_attack = None
-
-                # We have two cases to consider:
-                # 1. If any enemies are adjacent to us, pick the the weakest one.
-                # 2. Otherwise, pick the enemy closest to us and move towards them, breaking ties with reading order.
-                # If there are immediately adjacent enemies, simply attack the weakest.
-
-                # Case 1:
-                adj_enemies = sorted(adjacent_enemies((critter.x, critter.y), critter.race),
-                                     key=lambda x: critters[x].hit_points)
-                if len(adj_enemies) > 0:
-                    # print("Critter {} will attack".format(critter))
-                    enemy_to_attack = critters[adj_enemies[0]]
-
-                # Case 2:
-                else:
-                    # BFS.
-                    moves = [(critter.x + dx, critter.y + dy) for dx, dy in Game.delta]
-                    moves = [m for m in moves if can_be_occupied(m)]
-
-                    # Maintain a list of the best moves.
-                    best_moves = []
-
-                    # Now iterate over the moves, as this is how we would start off in reading order from our location.
-                    for move in moves:
-                        mx, my = move
-
-                        # If this puts us adjacent to an enemy, then stop.
-                        if len(adjacent_enemies(move, critter.race)) > 0:
-                            best_moves.append((move, 1, move))
-
-                        # Maintain a dictionary of the shortest way we've found to get to a tile.
-                        covered_tiles = {m: 1 for m in moves}
-                        covered_tiles[(critter.x, critter.y)] = 0
-
-                        # Maintain a stack of the most distant tiles to process for the BFS.
-                        stack = [(mx + dx, my + dy) for (dx, dy) in Game.delta]
-                        stack = [s for s in stack if s not in covered_tiles and can_be_occupied(s)]
-
-                        distance = 1
-                        cont = True
-                        while cont:
-                            distance += 1
-                            new_stack = []
-
-                            # Look for new tiles to add.
-                            for tile in stack:
-                                if tile in covered_tiles:
-                                    continue
-                                covered_tiles[tile] = distance
-
-                                tx, ty = tile
-                                # If there is an enemy adjacent to the tile, it's the best we can do.
-                                if len(adjacent_enemies(tile, critter.race)):
-                                    best_moves.append((move, distance, tile))
-                                    cont = False
-                                    continue
-
-                                # Add the newly reachable tiles.
-                                new_tiles = [(tx + dx, ty + dy) for (dx, dy) in Game.delta]
-                                new_stack += [t for t in new_tiles if t not in covered_tiles and can_be_occupied(t)]
-
-                            stack = list(set(new_stack))
-                            if not stack:
-                                cont = False
-
-                    # Filter out the moves that we can use.
-                    best_move = None
-                    if best_moves:
-                        # First condition: distance.
-                        min_dist = min(b[1] for b in best_moves)
-                        best_moves = [b for b in best_moves if b[1] == min_dist]
-
-                        # Second condition: for distance ties, choose first destination tile in reading order.
-                        best_moves.sort(key=lambda x: x[2])
-                        best_moves = [b for b in best_moves if b[2] == best_moves[0][2]]
-
-                        # Third condition: for ties on both, take the first step in reading order.
-                        best_moves.sort(key=lambda x: x[0])
-                        best_moves = [b for b in best_moves if b[0] == best_moves[0][0]]
-
-                        best_move = best_moves[0][0]
-
-                        # Move.
-                        critters[best_move] = critter
-                        del critters[(critter.x, critter.y)]
-                        critter.x, critter.y = best_move
-
-                        # If we are not adjacent to an enemy, attack the weakest one.
-                        adj_enemies = sorted(adjacent_enemies((critter.x, critter.y), critter.race),
-                                             key=lambda x: critters[x].hit_points)
-                        if len(adj_enemies) > 0:
-                            # print("Critter {} will attack".format(critter))
-                            enemy_to_attack = critters[adj_enemies[0]]
-
-                if enemy_to_attack is not None:
-                    # print("{} is attacking {}".format(critter, enemy_to_attack))
-                    enemy_to_attack.hit_points -= critter.attack_power
-                    if enemy_to_attack.hit_points <= 0:
-                        del critters[(enemy_to_attack.x, enemy_to_attack.y)]
-
+            all_units_acted, generation = _round(cells, occupied, races, xs, ys, hit_points, attack_powers, num_alive,
+                                                 order, stuck, first, queue, visited, generation,
+                                                 stop_on_elf_death)
             if all_units_acted:
                 num_rounds += 1
             else:
@@ -271,21 +320,26 @@ class Game:
 
             if debug:
                 print("*** AFTER ROUND {} ***".format(num_rounds))
-                self.print_board(critters)
+                self.print_board(races, xs, ys, hit_points)
 
         # At this point, sum up the remaining HP of all critters (since one race will be dead), and multiply by the
         # number of rounds.
         if debug:
             print("*** AFTER ROUND {} ***".format(num_rounds))
-            self.print_board(critters)
-        num_elves = len([c for c in critters.values() if c.race == Race.ELF])
-        # print("{} * {}".format(num_rounds, sum([c.hit_points for c in critters.values()])))
-        return num_rounds * sum([c.hit_points for c in critters.values()]), num_elves
+            self.print_board(races, xs, ys, hit_points)
+        num_elves = int(num_alive[Race.ELF.value])
+        if stop_on_elf_death and num_elves < np.count_nonzero(races == Race.ELF.value):
+            return None, num_elves
+        return num_rounds * int(hit_points[hit_points > 0].sum()), num_elves
 
-    def determine_elf_strength(self, debug=False):
+    def determine_elf_strength(self, debug=False, processes=None):
         """
         Run simulations with ever-increasing strengths for elves until we finally achieve a point where all of the
         elves survive, and beat the goblins.
+        The simulations are independent, so they are run in batches in parallel, one per worker process, and the
+        results are taken in order of strength, stopping at the first success. When debugging, they are run one at a
+        time instead, so that the boards printed by each simulation are not interleaved.
+        :param processes: the number of worker processes, by default the number of CPUs up to a maximum of eight
         :return: Return the score representing this scenario.
 
         # >>> Game(open('day_15_2.dat').read()).determine_elf_strength()
@@ -303,26 +357,31 @@ class Game:
         >>> Game(open('day_15_9.dat').read()).determine_elf_strength()
         943
         """
-        attack_power = 3
-
-        critters = deepcopy(self._critters)
-        elves = [c for c in critters.values() if c.race == Race.ELF]
+        num_elves = len([race for race, _, _ in self._snapshot if race == Race.ELF])
+        if debug:
+            attack_power = 4
+            while True:
+                score, pop = self.play(attack_power, debug=True, stop_on_elf_death=True)
+                if pop == num_elves:
+                    return score
+                attack_power += 1
 
-        while True:
-            attack_power += 1
-            for e in elves:
-                e.attack_power = attack_power
+        batch_size = processes or min(os.cpu_count() or 1, 8)
+        trial = partial(Game.play, self, stop_on_elf_death=True)
 
-            score, pop = self.play(critters, debug)
-            # print("str={}, survivors={}/{}".format(attack_power, pop, len(elves)))
-            if pop == len(elves):
-                return score
+        with Pool(batch_size) as pool:
+            attack_power = 4
+            while True:
+                for score, pop in pool.imap(trial, range(attack_power, attack_power + batch_size)):
+                    if pop == num_elves:
+                        return score
+                attack_power += batch_size
 
 
 if __name__ == '__main__':
     day = 15
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
 
     # 190012
     #a1 = Game(data).play()[0]
@@ -3,13 +3,14 @@
 # By Sebastian Raaphorst, 2018.
 
 
+from aoc_input import get_input
 import aocd
 
 
 if __name__ == '__main__':
     day = 0
     session = aocd.get_cookie()
-    data = aocd.get_data(session=session, year=2018, day=day)
+    data = get_input(day, session)
 
     a1 = None
     print('a1 = %r' % a1)